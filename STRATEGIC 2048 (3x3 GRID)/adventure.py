@@ -1,10 +1,8 @@
 import pygame
 from button import Button
-from draw import draw_board
-from move import (
-    move_left, move_right, move_up, move_down,
-    initialize_grid, add_new_tile, can_move
-)
+from draw import draw_board, draw_board_well
+from move import Board, report_seed
+from bitboard import LEFT, RIGHT, UP, DOWN
 from level_systems import (
     adventure_levels,
     level_selection_loop,
@@ -12,14 +10,20 @@ from level_systems import (
     show_game_over_message,
     unlock_next_level,
     is_final_level,
-    draw_adventure_info_board,
+    draw_adventure_info_frame,
+    draw_adventure_info_values,
     is_level_previously_completed,
     reset_target_tracking,
     initialize_level_targets,
-    check_adventure_win
+    record_created_tiles,
+    check_adventure_win,
+    info_board_rect
 )
+from fonts import get_font
+from renderer import Renderer, bake_layer
+from pacing import FramePacer
 
-def run_adventure_mode(screen, font):
+def run_adventure_mode(screen, font, seed=None):
     """Run the adventure mode game loop"""
     background_image = pygame.image.load(r"C:/Users/cristian/Documents/STRATEGIC 2048 (3x3 GRID)/LOGO/backgroundadventure.png")
     background_image = pygame.transform.scale(background_image, (700, 700))
@@ -39,14 +43,14 @@ def run_adventure_mode(screen, font):
     # Initialize target tracking
     initialize_level_targets(current_level, level_data)
     
-    # Initialize game state
-    grid = initialize_grid(3)
-    grid = add_new_tile(add_new_tile(grid))
-    score = 0
+    # Initialize game state; the Board keeps the score and empty cells
+    # up to date and spawns from the game's own seeded generator
+    game = Board(3, seed)
+    report_seed("Adventure", game)
     moves_used = 0
     
     # Create buttons
-    button_font = pygame.font.Font(None, 36)
+    button_font = get_font(36)
     home_btn = Button(None, (430, 190), "Home", button_font, "Black", "Red")
     restart_btn = Button(None, (570, 190), "Restart", button_font, "Black", "Red")
     
@@ -54,26 +58,51 @@ def run_adventure_mode(screen, font):
         """Restart current level"""
         reset_target_tracking(current_level)
         initialize_level_targets(current_level, level_data)
-        new_grid = initialize_grid(3)
-        return add_new_tile(add_new_tile(new_grid)), 0, 0
+        new_game = Board(3)
+        report_seed("Adventure", new_game)
+        return new_game, 0
     
-    clock = pygame.time.Clock()
+    key_directions = {
+        pygame.K_LEFT: LEFT, pygame.K_a: LEFT,
+        pygame.K_RIGHT: RIGHT, pygame.K_d: RIGHT,
+        pygame.K_UP: UP, pygame.K_w: UP,
+        pygame.K_DOWN: DOWN, pygame.K_s: DOWN,
+    }
     
-    while True:
-        screen.fill((250, 248, 239))
-        screen.blit(background_image, (0, 0))
+    def draw_static(surface):
+        surface.fill((250, 248, 239))
+        surface.blit(background_image, (0, 0))
+        draw_board_well(surface, 3, 3)
+        draw_adventure_info_frame(surface, font, current_level, level_data)
+    
+    def draw_frame(screen):
+        # Background, empty board and info box frames come from the static layer
+        screen.blit(static_layer, (0, 0))
         # Draw the game board
-        draw_board(screen, grid, score, "", font, show_score=True)
+        draw_board(screen, game.grid, game.score, "", font, show_score=True, board_well=True)
         
         # Draw adventure info
-        draw_adventure_info_board(screen, font, current_level, level_data, grid, moves_used)
+        draw_adventure_info_values(screen, font, current_level, level_data, moves_used)
         
         # Draw buttons
         home_btn.update(screen)
         restart_btn.update(screen)
+    
+    pacer = FramePacer()
+    renderer = Renderer(screen)
+    static_layer = bake_layer(screen, draw_static)  # redrawn when the level changes
+    
+    while True:
+        # Only the cells and info boards that changed are redrawn; target
+        # progress only changes when a move is made
+        renderer.track_board(game.grid)
+        renderer.track("info", info_board_rect(screen), (current_level, moves_used))
+        renderer.track_button("home", home_btn)
+        renderer.track_button("restart", restart_btn)
+        renderer.present(draw_frame)
         
         # Handle events
-        for event in pygame.event.get():
+        for event in pacer.events():
             if event.type == pygame.QUIT:
                 return "home"
             
@@ -81,33 +110,28 @@ def run_adventure_mode(screen, font):
                 if home_btn.checkforinput(event.pos):
                     return "home"
                 elif restart_btn.checkforinput(event.pos):
-                    grid, score, moves_used = restart_level()
+                    game, moves_used = restart_level()
             
             elif event.type == pygame.KEYDOWN:
-                moved = False
-                gained = 0
-                
-                if event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                    grid, moved, gained = move_left(grid)
-                elif event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                    grid, moved, gained = move_right(grid)
-                elif event.key == pygame.K_UP or event.key == pygame.K_w:
-                    grid, moved, gained = move_up(grid)
-                elif event.key == pygame.K_DOWN or event.key == pygame.K_s:
-                    grid, moved, gained = move_down(grid)
-                elif event.key == pygame.K_r:  # R key for restart
-                    grid, score, moves_used = restart_level()
+                if event.key == pygame.K_r:  # R key for restart
+                    game, moves_used = restart_level()
                     continue
                 elif event.key == pygame.K_ESCAPE:  # ESC key for home
                     return "home"
                 
+                direction = key_directions.get(event.key)
+                if direction is None:
+                    continue
+                
+                # Slides the board and spawns the next tile
+                moved, _, created = game.move(direction)
+                
                 if moved:
-                    score += gained
                     moves_used += 1
-                    grid = add_new_tile(grid)
+                    record_created_tiles(current_level, created)
                     
                     # Check win condition
-                    if check_adventure_win(current_level, level_data, grid) == "win":
+                    if check_adventure_win(current_level, level_data, game.grid) == "win":
                         is_replay = is_level_previously_completed("adventure", current_level)
                         
                         if not is_final_level("adventure", current_level):
@@ -115,8 +139,9 @@ def run_adventure_mode(screen, font):
                         
                         result = show_level_complete_message(
                             screen, font, "adventure", current_level, 
-                            score, moves_used, is_replay=is_replay
+                            game.score, moves_used, is_replay=is_replay
                         )
+                        renderer.invalidate()  # the popup covered the screen
                         
                         if result == "next_level" and not is_final_level("adventure", current_level):
                             # Go to next level
@@ -125,11 +150,12 @@ def run_adventure_mode(screen, font):
                                 level_data = adventure_levels[current_level - 1].copy()
                                 level_data["level_number"] = current_level
                                 initialize_level_targets(current_level, level_data)
-                                grid, score, moves_used = restart_level()
+                                game, moves_used = restart_level()
+                                static_layer = bake_layer(screen, draw_static)
                             else:
                                 return "home"
                         elif result == "retry":
-                            grid, score, moves_used = restart_level()
+                            game, moves_used = restart_level()
                         elif result == "home":
                             return "home"
                         
@@ -138,19 +164,18 @@ def run_adventure_mode(screen, font):
                     # Check game over conditions
                     if moves_used >= level_data["max_moves"]:
                         result = show_game_over_message(screen, font, "adventure", current_level, "No more moves left!")
+                        renderer.invalidate()
                         if result == "retry":
-                            grid, score, moves_used = restart_level()
+                            game, moves_used = restart_level()
                         elif result == "home":
                             return "home"
                         continue
                     
-                    if not can_move(grid):
+                    if not game.legal_moves():
                         result = show_game_over_message(screen, font, "adventure", current_level, "No more moves possible!")
+                        renderer.invalidate()
                         if result == "retry":
-                            grid, score, moves_used = restart_level()
+                            game, moves_used = restart_level()
                         elif result == "home":
                             return "home"
-                        continue
-        
-        pygame.display.flip()
-        clock.tick(60)
\ No newline at end of file
+                        continue
\ No newline at end of file
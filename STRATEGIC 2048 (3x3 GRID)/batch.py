@@ -0,0 +1,224 @@
+import numpy as np
+
+import bitboard
+
+# Batched version of the packed engine: many boards stored as an (N,)
+# uint64 array, moved together with NumPy fancy indexing into the same row
+# tables bitboard.py uses for single boards.
+_ROW_MASK = np.uint64(bitboard.ROW_MASK)
+_CELL_MASK = np.uint64(bitboard.CELL_MASK)
+_ROW_SHIFTS = [np.uint64(bitboard.ROW_BITS * r) for r in range(bitboard.SIZE)]
+
+ROW_LEFT = np.array(bitboard.ROW_LEFT, dtype=np.uint64)
+ROW_RIGHT = np.array(bitboard.ROW_RIGHT, dtype=np.uint64)
+ROW_LEFT_SCORE = np.array(bitboard.ROW_LEFT_SCORE, dtype=np.int64)
+ROW_RIGHT_SCORE = np.array(bitboard.ROW_RIGHT_SCORE, dtype=np.int64)
+TRANSPOSE = [np.array(table, dtype=np.uint64) for table in bitboard.TRANSPOSE]
+ROW_LEGAL = np.array(bitboard.ROW_LEGAL, dtype=np.uint8)
+COL_LEGAL = np.array(bitboard.COL_LEGAL, dtype=np.uint8)
+_DIRECTION_BITS = np.array([1 << d for d in bitboard.DIRECTIONS], dtype=np.uint8)
+ROW_EMPTY = np.array(bitboard.ROW_EMPTY, dtype=np.int64)
+# EMPTY_COUNT[mask] is the number of empty cells in a board's empty mask and
+# EMPTY_SHIFT[mask, i] the bit shift of its i-th empty cell, row-major
+EMPTY_COUNT = np.array([len(cells) for cells in bitboard.EMPTY_CELLS], dtype=np.int64)
+EMPTY_SHIFT = np.array([cells + (0,) * (bitboard.SIZE * bitboard.SIZE - len(cells))
+                        for cells in bitboard.EMPTY_CELLS], dtype=np.uint64)
+
+
+def pack_boards(grids):
+    """Pack an (N, SIZE, SIZE) array of tile values into an (N,) uint64 array"""
+    grids = np.asarray(grids, dtype=np.int64)
+    if grids.ndim != 3 or grids.shape[1:] != (bitboard.SIZE, bitboard.SIZE):
+        raise ValueError(f"expected an (N, {bitboard.SIZE}, {bitboard.SIZE}) array")
+    # log2 of a power of two is exact; empty cells stay 0
+    exponents = np.zeros(grids.shape, dtype=np.uint64)
+    nonzero = grids > 0
+    exponents[nonzero] = np.log2(grids[nonzero]).astype(np.uint64)
+    cells = exponents.reshape(len(grids), -1)
+    boards = np.zeros(len(grids), dtype=np.uint64)
+    for i in range(cells.shape[1]):
+        boards |= cells[:, i] << np.uint64(bitboard.CELL_BITS * i)
+    return boards
+
+
+def unpack_exponents(boards):
+    """Return the (N, SIZE * SIZE) cell exponents of packed boards, row-major"""
+    boards = np.asarray(boards, dtype=np.uint64)
+    shifts = np.arange(bitboard.SIZE * bitboard.SIZE, dtype=np.uint64) * np.uint64(bitboard.CELL_BITS)
+    return ((boards[:, None] >> shifts) & _CELL_MASK).astype(np.int64)
+
+
+def unpack_boards(boards):
+    """Unpack an (N,) uint64 array into an (N, SIZE, SIZE) array of tile values"""
+    exponents = unpack_exponents(boards)
+    values = np.where(exponents > 0, np.left_shift(1, exponents), 0)
+    return values.reshape(-1, bitboard.SIZE, bitboard.SIZE)
+
+
+def _rows(boards):
+    return [(boards >> shift) & _ROW_MASK for shift in _ROW_SHIFTS]
+
+
+def _slide_rows(boards, table, score_table):
+    new_boards = np.zeros_like(boards)
+    scores = np.zeros(len(boards), dtype=np.int64)
+    for shift, keys in zip(_ROW_SHIFTS, _rows(boards)):
+        new_boards |= table[keys] << shift
+        scores += score_table[keys]
+    return new_boards, scores
+
+
+def _transpose(boards):
+    transposed = np.zeros_like(boards)
+    for spread, keys in zip(TRANSPOSE, _rows(boards)):
+        transposed |= spread[keys]
+    return transposed
+
+
+def _move_packed(boards, direction):
+    if direction == bitboard.LEFT:
+        return _slide_rows(boards, ROW_LEFT, ROW_LEFT_SCORE)
+    if direction == bitboard.RIGHT:
+        return _slide_rows(boards, ROW_RIGHT, ROW_RIGHT_SCORE)
+    table, score_table = ((ROW_LEFT, ROW_LEFT_SCORE) if direction == bitboard.UP
+                          else (ROW_RIGHT, ROW_RIGHT_SCORE))
+    new_boards, scores = _slide_rows(_transpose(boards), table, score_table)
+    return _transpose(new_boards), scores
+
+
+def move_boards(boards, direction):
+    """Apply a move to many boards at once.
+
+    boards is either an (N,) uint64 array of packed boards or an
+    (N, SIZE, SIZE) array of tile values; the new boards come back in the
+    same form. direction is one of bitboard.LEFT/RIGHT/UP/DOWN, or an (N,)
+    array giving one direction per board.
+
+    Returns (new_boards, moved, scores) where moved is an (N,) bool array
+    and scores an (N,) int64 array of score gains.
+    """
+    grids = np.ndim(boards) == 3
+    packed = pack_boards(boards) if grids else np.asarray(boards, dtype=np.uint64)
+
+    if np.ndim(direction) == 0:
+        new_boards, scores = _move_packed(packed, int(direction))
+    else:
+        direction = np.asarray(direction)
+        if direction.shape != packed.shape:
+            raise ValueError("need exactly one direction per board")
+        new_boards = packed.copy()
+        scores = np.zeros(len(packed), dtype=np.int64)
+        for d in bitboard.DIRECTIONS:
+            selected = direction == d
+            if selected.any():
+                new_boards[selected], scores[selected] = _move_packed(packed[selected], d)
+
+    moved = new_boards != packed
+    if grids:
+        new_boards = unpack_boards(new_boards)
+    return new_boards, moved, scores
+
+
+def legal_moves(boards):
+    """Legal directions and finished games for many boards at once.
+
+    boards is an (N,) uint64 array or an (N, SIZE, SIZE) array of tile
+    values. Returns (legal, terminal): legal is an (N, 4) bool array whose
+    column d tells whether direction d changes the board, and terminal an
+    (N,) bool array that matches bitboard.game_over (a board with no legal
+    move, except the empty board).
+    """
+    packed = pack_boards(boards) if np.ndim(boards) == 3 else np.asarray(boards, dtype=np.uint64)
+    masks = np.zeros(len(packed), dtype=np.uint8)
+    for keys in _rows(packed):
+        masks |= ROW_LEGAL[keys]
+    for keys in _rows(_transpose(packed)):
+        masks |= COL_LEGAL[keys]
+    legal = (masks[:, None] & _DIRECTION_BITS) != 0
+    terminal = (masks == 0) & (packed != 0)
+    return legal, terminal
+
+
+# SplitMix64 constants, for the counter-based per-board streams
+_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _splitmix64(x):
+    """SplitMix64 finalizer over a uint64 array (wrapping arithmetic)"""
+    x = (x ^ (x >> np.uint64(30))) * _MIX1
+    x = (x ^ (x >> np.uint64(27))) * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+class BoardStreams:
+    """Counter-based random streams, one per board, for spawn_tiles.
+
+    Draw k of board i at step t is a SplitMix64 hash of (seed, i, t, k), so
+    a board's spawns depend only on the seed, its index in the original
+    batch and how many times the batch has spawned, and a whole batch is
+    still drawn with a few vectorized operations. Index it like the boards
+    (streams[mask]) when finished boards are dropped from a batch.
+    """
+
+    def __init__(self, seed, ids, step=0):
+        self.seed = seed
+        self.ids = np.asarray(ids, dtype=np.uint64)
+        self.step = step
+        # SeedSequence turns any seed (None included) into a well mixed key
+        self._key = np.random.SeedSequence(seed).generate_state(1, np.uint64)[0]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, selection):
+        streams = BoardStreams.__new__(BoardStreams)
+        streams.seed, streams.step, streams._key = self.seed, self.step, self._key
+        streams.ids = self.ids[selection]
+        return streams
+
+    def random(self, size):
+        """(len(self), k) floats in [0, 1), as Generator.random; advances the step"""
+        count, k = size
+        if count != len(self.ids):
+            raise ValueError(f"{count} boards but {len(self.ids)} streams")
+        with np.errstate(over="ignore"):
+            board_keys = _splitmix64(self._key ^ (self.ids * _GAMMA))
+            counters = np.uint64(self.step * k) + np.arange(1, k + 1, dtype=np.uint64)
+            bits = _splitmix64(board_keys[:, None] + counters * _GAMMA)
+        self.step += 1
+        return (bits >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def board_streams(seed, count):
+    """BoardStreams for a new batch of count boards"""
+    return BoardStreams(seed, np.arange(count))
+
+
+def spawn_tiles(boards, rng):
+    """Add a 2 (90%) or a 4 (10%) to a random empty cell of every board.
+
+    boards is an (N,) uint64 array or an (N, SIZE, SIZE) array of tile
+    values; rng is a numpy.random.Generator, or BoardStreams (see
+    board_streams) when every board's spawns must not depend on the other
+    boards in the batch. Every board takes exactly two draws per call, even
+    when it is full, drawn in one rng.random((N, 2)) call. Full boards are
+    returned unchanged.
+    """
+    grids = np.ndim(boards) == 3
+    packed = pack_boards(boards) if grids else np.asarray(boards, dtype=np.uint64)
+
+    draws = rng.random((len(packed), 2))
+    masks = np.zeros(len(packed), dtype=np.int64)
+    for r, keys in enumerate(_rows(packed)):
+        masks |= ROW_EMPTY[keys.astype(np.int64)] << (bitboard.SIZE * r)
+    counts = EMPTY_COUNT[masks]
+    # index of the chosen empty cell among the empty cells of each board
+    choice = np.minimum((draws[:, 0] * counts).astype(np.int64), np.maximum(counts - 1, 0))
+    exponent = np.where(draws[:, 1] < 0.9, 1, 2).astype(np.uint64)
+    new_boards = np.where(counts > 0, packed | (exponent << EMPTY_SHIFT[masks, choice]), packed)
+
+    if grids:
+        new_boards = unpack_boards(new_boards)
+    return new_boards
@@ -0,0 +1,177 @@
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+
+import move
+from bitboard import LEGAL_DIRECTIONS
+
+# Micro-benchmarks for the move.py API. Every function runs over the same
+# corpus of boards taken from seeded random games, several times over, and
+# the throughput is reported as ops/sec with a 95% confidence interval.
+# Results can be saved as a JSON baseline and later runs compared with it.
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.10  # fail when a function gets more than 10% slower, beyond noise
+CORPUS_SEED = 2048
+CORPUS_GAMES = 50
+Z_95 = 1.96
+MOVES = (move.move_left, move.move_right, move.move_up, move.move_down)
+
+
+def build_corpus(seed=CORPUS_SEED, games=CORPUS_GAMES):
+    """Every position of a few seeded random games, as 3x3 grids"""
+    rng = move.GameRandom(seed)
+    corpus = []
+    for _ in range(games):
+        grid = move.add_new_tile(move.add_new_tile(move.initialize_grid(3), rng), rng)
+        legal = move.legal_moves(grid)
+        while legal:
+            corpus.append([row[:] for row in grid])
+            grid, _, _, _ = MOVES[rng.choice(LEGAL_DIRECTIONS[legal])](grid)
+            grid = move.add_new_tile(grid, rng)
+            legal = move.legal_moves(grid)
+    return corpus
+
+
+def _play_random_game(rng):
+    grid = move.add_new_tile(move.add_new_tile(move.initialize_grid(3), rng), rng)
+    while not move.game_over(grid):
+        grid, moved, _, _ = rng.choice(MOVES)(grid)
+        if moved:
+            grid = move.add_new_tile(grid, rng)
+
+
+def _cases(corpus):
+    """(name, setup) pairs; setup returns a zero-argument callable to time
+    and the number of operations one call performs"""
+    rows = [row for grid in corpus for row in grid]
+
+    def over_grids(function):
+        def run():
+            for grid in corpus:
+                function(grid)
+        return run, len(corpus)
+
+    def merge_rows():
+        def run():
+            for row in rows:
+                move.merge_row_left(row)
+        return run, len(rows)
+
+    def add_tiles():
+        # add_new_tile fills a cell in place, so give it fresh copies
+        grids = [[row[:] for row in grid] for grid in corpus]
+        rng = move.GameRandom(CORPUS_SEED)
+
+        def run():
+            for grid in grids:
+                move.add_new_tile(grid, rng)
+        return run, len(grids)
+
+    def random_games():
+        rng = move.GameRandom(CORPUS_SEED)
+
+        def run():
+            for _ in range(20):
+                _play_random_game(rng)
+        return run, 20
+
+    return [
+        ("merge_row_left", merge_rows),
+        ("move_left", lambda: over_grids(move.move_left)),
+        ("move_right", lambda: over_grids(move.move_right)),
+        ("move_up", lambda: over_grids(move.move_up)),
+        ("move_down", lambda: over_grids(move.move_down)),
+        ("add_new_tile", add_tiles),
+        ("can_move", lambda: over_grids(move.can_move)),
+        ("game_over", lambda: over_grids(move.game_over)),
+        ("random_game", random_games),
+    ]
+
+
+def measure(setup, repeats):
+    """Time repeats runs; returns (mean ops/sec, 95% CI half-width)"""
+    samples = []
+    for _ in range(repeats):
+        run, operations = setup()
+        start = time.perf_counter()
+        run()
+        samples.append(operations / (time.perf_counter() - start))
+    mean = statistics.fmean(samples)
+    if len(samples) < 2:
+        return mean, 0.0
+    return mean, Z_95 * statistics.stdev(samples) / math.sqrt(len(samples))
+
+
+def run_benchmarks(repeats=10, only=None):
+    corpus = build_corpus()
+    results = {}
+    for name, setup in _cases(corpus):
+        if only and name not in only:
+            continue
+        mean, ci = measure(setup, repeats)
+        results[name] = {"ops_per_sec": mean, "ci95": ci}
+        print(f"{name:>15}: {mean:>12,.0f} ops/sec  +/- {ci:,.0f}")
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return the names of functions slower than baseline by more than threshold.
+
+    A slowdown only counts when the 95% confidence intervals of the two runs
+    do not overlap as well, so run-to-run noise is not reported as a
+    regression.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["ops_per_sec"]
+        after = result["ops_per_sec"]
+        change = after / before - 1.0
+        separate = after + result["ci95"] < before - baseline[name].get("ci95", 0.0)
+        flag = ""
+        if change < -threshold and separate:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif change < -threshold:
+            flag = "  (within noise)"
+        print(f"{name:>15}: {change:+.1%} vs baseline{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the move.py engine")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--only", nargs="*", help="benchmark only these functions")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON baseline file")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before failing, as a fraction")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeats, args.only)
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --save to create one")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Regressed past {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,881 @@
+import random
+
+# A packed board stores the nine cells of a 3x3 grid in one integer.
+# Every cell takes 4 bits holding the tile exponent (0 = empty, 1 = 2,
+# 2 = 4, ...). Cell (r, c) lives at bit 4 * (r * SIZE + c), so each row is
+# a 12 bit block and row 0 is the lowest block.
+SIZE = 3
+CELL_BITS = 4
+ROW_BITS = CELL_BITS * SIZE
+CELL_MASK = (1 << CELL_BITS) - 1
+ROW_MASK = (1 << ROW_BITS) - 1
+MAX_EXPONENT = CELL_MASK  # 2 ** 15 = 32768, far above what 3x3 can reach
+
+LEFT, RIGHT, UP, DOWN = 0, 1, 2, 3
+DIRECTIONS = (LEFT, RIGHT, UP, DOWN)
+DIRECTION_NAMES = ("LEFT", "RIGHT", "UP", "DOWN")
+# Bits of the legal-move mask returned by legal_moves
+LEFT_BIT, RIGHT_BIT, UP_BIT, DOWN_BIT = (1 << d for d in DIRECTIONS)
+# LEGAL_DIRECTIONS[mask] lists the directions set in a legal-move mask
+LEGAL_DIRECTIONS = [tuple(d for d in DIRECTIONS if mask >> d & 1) for mask in range(1 << len(DIRECTIONS))]
+
+
+def value_to_exponent(value):
+    """Convert a tile value (0, 2, 4, ...) to its exponent"""
+    return value.bit_length() - 1 if value else 0
+
+
+def exponent_to_value(exponent):
+    """Convert a tile exponent back to the tile value"""
+    return 1 << exponent if exponent else 0
+
+
+def pack_row(row):
+    """Pack one row of tile values into a row key"""
+    key = 0
+    for i, value in enumerate(row):
+        key |= value_to_exponent(value) << (CELL_BITS * i)
+    return key
+
+
+def pack(grid):
+    """Pack a list-of-lists grid into a board integer"""
+    # Whole rows are looked up by their values (ROW_KEYS); a row of the
+    # wrong length or with a value that is not a tile is not in the table
+    try:
+        r0, r1, r2 = grid
+        return ROW_KEYS[(*r0,)] | (ROW_KEYS[(*r1,)] << _SHIFT1) | (ROW_KEYS[(*r2,)] << _SHIFT2)
+    except (KeyError, ValueError):
+        raise ValueError(f"packed boards are {SIZE}x{SIZE} grids of tile values") from None
+
+
+def unpack(board):
+    """Unpack a board integer into a new list-of-lists grid"""
+    return [list(ROW_VALUES[board & ROW_MASK]), list(ROW_VALUES[(board >> _SHIFT1) & ROW_MASK]),
+            list(ROW_VALUES[board >> _SHIFT2])]
+
+
+def get_cell(board, r, c):
+    """Return the exponent stored in cell (r, c)"""
+    return (board >> (CELL_BITS * (r * SIZE + c))) & CELL_MASK
+
+
+def get_row(board, r):
+    return (board >> (ROW_BITS * r)) & ROW_MASK
+
+
+def get_col(board, c):
+    """Gather column c into a row-shaped key, top cell first"""
+    key = 0
+    for r in range(SIZE):
+        key |= ((board >> (CELL_BITS * (r * SIZE + c))) & CELL_MASK) << (CELL_BITS * r)
+    return key
+
+
+def spread_col(key, c, size=SIZE):
+    """Inverse of get_col: place a row-shaped key back into column c"""
+    board = 0
+    for r in range(size):
+        board |= ((key >> (CELL_BITS * r)) & CELL_MASK) << (CELL_BITS * (r * size + c))
+    return board
+
+
+def reverse_row(key, size=SIZE):
+    reversed_key = 0
+    for i in range(size):
+        reversed_key |= ((key >> (CELL_BITS * i)) & CELL_MASK) << (CELL_BITS * (size - 1 - i))
+    return reversed_key
+
+
+def _slide_row(key, size=SIZE):
+    """Slide and merge one packed row towards cell 0.
+
+    Returns (new_key, score, created) where created counts the merged tiles
+    by exponent, 4 bits per exponent (see created_count). Only used to
+    build the row tables.
+    """
+    tiles = []
+    for i in range(size):
+        exponent = (key >> (CELL_BITS * i)) & CELL_MASK
+        if exponent:
+            tiles.append(exponent)
+    new_key = 0
+    score = 0
+    created = 0
+    out = 0
+    i = 0
+    while i < len(tiles):
+        exponent = tiles[i]
+        if i + 1 < len(tiles) and tiles[i + 1] == exponent and exponent < MAX_EXPONENT:
+            exponent += 1
+            score += 1 << exponent
+            created += 1 << (CELL_BITS * exponent)
+            i += 1
+        new_key |= exponent << (CELL_BITS * out)
+        out += 1
+        i += 1
+    return new_key, score, created
+
+
+def _build_row_tables():
+    """Precompute the result of a left and a right move for every row.
+
+    A row has only 16 ** SIZE possible values, so every move becomes a
+    handful of list lookups instead of rebuilding lists per row.
+    """
+    left, right = [], []
+    left_score, right_score = [], []
+    left_created, right_created = [], []
+    for key in range(1 << ROW_BITS):
+        new_key, score, created = _slide_row(key)
+        left.append(new_key)
+        left_score.append(score)
+        left_created.append(created)
+        new_key, score, created = _slide_row(reverse_row(key))
+        right.append(reverse_row(new_key))
+        right_score.append(score)
+        right_created.append(created)
+    return left, right, left_score, right_score, left_created, right_created
+
+
+def _build_transpose_tables():
+    """TRANSPOSE[r][key] places row key r into column r of an empty board"""
+    return [[spread_col(key, r) for key in range(1 << ROW_BITS)] for r in range(SIZE)]
+
+
+(ROW_LEFT, ROW_RIGHT, ROW_LEFT_SCORE, ROW_RIGHT_SCORE,
+ ROW_LEFT_CREATED, ROW_RIGHT_CREATED) = _build_row_tables()
+TRANSPOSE = _build_transpose_tables()
+ROW_REVERSED = [reverse_row(key) for key in range(1 << ROW_BITS)]
+ROW_VALUES = [tuple(exponent_to_value((key >> (CELL_BITS * i)) & CELL_MASK) for i in range(SIZE))
+              for key in range(1 << ROW_BITS)]
+# ROW_KEYS maps a row's tile values back to its key, for packing list grids
+ROW_KEYS = {values: key for key, values in enumerate(ROW_VALUES)}
+_T0, _T1, _T2 = TRANSPOSE
+# Legal directions contributed by one row; a column is a row of the
+# transposed board, so its left/right bits become up/down.
+ROW_LEGAL = [(LEFT_BIT if ROW_LEFT[key] != key else 0) | (RIGHT_BIT if ROW_RIGHT[key] != key else 0)
+             for key in range(1 << ROW_BITS)]
+COL_LEGAL = [legal << 2 for legal in ROW_LEGAL]
+# ROW_EMPTY[key] has bit i set when cell i of the row is empty, and
+# EMPTY_CELLS[mask] lists the bit shifts of the empty cells of a whole
+# board mask (bit r * SIZE + c for cell (r, c)), in row-major order.
+ROW_EMPTY = [sum(1 << i for i in range(SIZE) if not (key >> (CELL_BITS * i)) & CELL_MASK)
+             for key in range(1 << ROW_BITS)]
+EMPTY_CELLS = [tuple(CELL_BITS * i for i in range(SIZE * SIZE) if mask >> i & 1)
+               for mask in range(1 << (SIZE * SIZE))]
+_SHIFT1 = ROW_BITS
+_SHIFT2 = 2 * ROW_BITS
+
+
+def merge_row(key):
+    """Table lookup for a left move of one packed row: (new_key, score, created)"""
+    return ROW_LEFT[key], ROW_LEFT_SCORE[key], ROW_LEFT_CREATED[key]
+
+
+def transpose(board):
+    return _T0[board & ROW_MASK] | _T1[(board >> _SHIFT1) & ROW_MASK] | _T2[board >> _SHIFT2]
+
+
+def mirror(board):
+    """Reverse every row (left-right mirror)"""
+    return (ROW_REVERSED[board & ROW_MASK] | (ROW_REVERSED[(board >> _SHIFT1) & ROW_MASK] << _SHIFT1)
+            | (ROW_REVERSED[board >> _SHIFT2] << _SHIFT2))
+
+
+def flip(board):
+    """Reverse the row order (top-bottom mirror)"""
+    return ((board & ROW_MASK) << _SHIFT2) | (board & (ROW_MASK << _SHIFT1)) | (board >> _SHIFT2)
+
+
+# The eight symmetries of the square. Symmetry s first transposes the board
+# when s & 4, then mirrors it left-right when s & 1 and flips it top-bottom
+# when s & 2. SYMMETRY_CELLS[s][i] is where cell i (= r * SIZE + c) ends up.
+SYMMETRIES = range(8)
+
+
+def _symmetry_cell(s, r, c):
+    if s & 4:
+        r, c = c, r
+    if s & 1:
+        c = SIZE - 1 - c
+    if s & 2:
+        r = SIZE - 1 - r
+    return r * SIZE + c
+
+
+SYMMETRY_CELLS = [tuple(_symmetry_cell(s, i // SIZE, i % SIZE) for i in range(SIZE * SIZE)) for s in SYMMETRIES]
+# INVERSE_SYMMETRY[s] undoes symmetry s
+INVERSE_SYMMETRY = [next(t for t in SYMMETRIES
+                         if all(SYMMETRY_CELLS[t][SYMMETRY_CELLS[s][i]] == i for i in range(SIZE * SIZE)))
+                    for s in SYMMETRIES]
+
+
+def _build_symmetry_tables():
+    """SYMMETRY_ROWS[s][r][key] is row key r moved to its place under symmetry s"""
+    tables = []
+    for cells in SYMMETRY_CELLS:
+        per_row = []
+        for r in range(SIZE):
+            table = []
+            for key in range(1 << ROW_BITS):
+                board = 0
+                for c in range(SIZE):
+                    board |= ((key >> (CELL_BITS * c)) & CELL_MASK) << (CELL_BITS * cells[r * SIZE + c])
+                table.append(board)
+            per_row.append(table)
+        tables.append(per_row)
+    return tables
+
+
+def _build_direction_map():
+    """DIRECTION_MAP[s][d]: the direction on the transformed board that
+    does what d does on the original one"""
+    steps = {LEFT: (0, -1), RIGHT: (0, 1), UP: (-1, 0), DOWN: (1, 0)}
+    by_step = {step: d for d, step in steps.items()}
+    mapping = []
+    for s in SYMMETRIES:
+        row = []
+        for d in DIRECTIONS:
+            dr, dc = steps[d]
+            if s & 4:
+                dr, dc = dc, dr
+            if s & 1:
+                dc = -dc
+            if s & 2:
+                dr = -dr
+            row.append(by_step[dr, dc])
+        mapping.append(tuple(row))
+    return mapping
+
+
+SYMMETRY_ROWS = _build_symmetry_tables()
+DIRECTION_MAP = _build_direction_map()
+_SYMMETRY_ROWS_NO_IDENTITY = [(s, *SYMMETRY_ROWS[s]) for s in SYMMETRIES if s]
+
+
+def apply_symmetry(board, s):
+    """Transform a board by symmetry s (three table lookups)"""
+    t0, t1, t2 = SYMMETRY_ROWS[s]
+    return t0[board & ROW_MASK] | t1[(board >> _SHIFT1) & ROW_MASK] | t2[board >> _SHIFT2]
+
+
+def canonical(board):
+    """Smallest of the eight rotations/reflections of a board.
+
+    Symmetric boards share one canonical form, so caches keyed by it hold
+    each position once.
+    """
+    k0 = board & ROW_MASK
+    k1 = (board >> _SHIFT1) & ROW_MASK
+    k2 = board >> _SHIFT2
+    best = board
+    for _, t0, t1, t2 in _SYMMETRY_ROWS_NO_IDENTITY:
+        candidate = t0[k0] | t1[k1] | t2[k2]
+        if candidate < best:
+            best = candidate
+    return best
+
+
+def canonical_symmetry(board):
+    """Return (canonical board, s) with apply_symmetry(board, s) == canonical.
+
+    A move d found for the canonical board is DIRECTION_MAP[INVERSE_SYMMETRY[s]][d]
+    on the original one (see map_direction).
+    """
+    k0 = board & ROW_MASK
+    k1 = (board >> _SHIFT1) & ROW_MASK
+    k2 = board >> _SHIFT2
+    best = board
+    best_symmetry = 0
+    for s, t0, t1, t2 in _SYMMETRY_ROWS_NO_IDENTITY:
+        candidate = t0[k0] | t1[k1] | t2[k2]
+        if candidate < best:
+            best = candidate
+            best_symmetry = s
+    return best, best_symmetry
+
+
+def map_direction(direction, s):
+    """Direction on the original board for a direction on apply_symmetry(board, s)"""
+    return DIRECTION_MAP[INVERSE_SYMMETRY[s]][direction]
+
+
+def created_count(created, value):
+    """How many tiles of the given value a created record contains"""
+    return (created >> (CELL_BITS * value_to_exponent(value))) & CELL_MASK
+
+
+def created_values(created):
+    """Yield (value, count) pairs for every tile value in a created record"""
+    exponent = 0
+    while created:
+        count = created & CELL_MASK
+        if count:
+            yield 1 << exponent, count
+        created >>= CELL_BITS
+        exponent += 1
+
+
+def created_total(created):
+    """Total number of tiles in a created record, i.e. merges in the move"""
+    total = 0
+    while created:
+        total += created & CELL_MASK
+        created >>= CELL_BITS
+    return total
+
+
+def created_max_exponent(created):
+    """Highest exponent in a created record (0 when the move merged nothing)"""
+    return (created.bit_length() + CELL_BITS - 1) // CELL_BITS - 1 if created else 0
+
+
+def move_left(board):
+    k0 = board & ROW_MASK
+    k1 = (board >> _SHIFT1) & ROW_MASK
+    k2 = board >> _SHIFT2
+    new_board = ROW_LEFT[k0] | (ROW_LEFT[k1] << _SHIFT1) | (ROW_LEFT[k2] << _SHIFT2)
+    score = ROW_LEFT_SCORE[k0] + ROW_LEFT_SCORE[k1] + ROW_LEFT_SCORE[k2]
+    created = ROW_LEFT_CREATED[k0] + ROW_LEFT_CREATED[k1] + ROW_LEFT_CREATED[k2]
+    return new_board, new_board != board, score, created
+
+
+def move_right(board):
+    k0 = board & ROW_MASK
+    k1 = (board >> _SHIFT1) & ROW_MASK
+    k2 = board >> _SHIFT2
+    new_board = ROW_RIGHT[k0] | (ROW_RIGHT[k1] << _SHIFT1) | (ROW_RIGHT[k2] << _SHIFT2)
+    score = ROW_RIGHT_SCORE[k0] + ROW_RIGHT_SCORE[k1] + ROW_RIGHT_SCORE[k2]
+    created = ROW_RIGHT_CREATED[k0] + ROW_RIGHT_CREATED[k1] + ROW_RIGHT_CREATED[k2]
+    return new_board, new_board != board, score, created
+
+
+def move_up(board):
+    # Columns become rows of the transposed board, then go back through the
+    # same transpose tables.
+    t = _T0[board & ROW_MASK] | _T1[(board >> _SHIFT1) & ROW_MASK] | _T2[board >> _SHIFT2]
+    k0 = t & ROW_MASK
+    k1 = (t >> _SHIFT1) & ROW_MASK
+    k2 = t >> _SHIFT2
+    new_board = _T0[ROW_LEFT[k0]] | _T1[ROW_LEFT[k1]] | _T2[ROW_LEFT[k2]]
+    score = ROW_LEFT_SCORE[k0] + ROW_LEFT_SCORE[k1] + ROW_LEFT_SCORE[k2]
+    created = ROW_LEFT_CREATED[k0] + ROW_LEFT_CREATED[k1] + ROW_LEFT_CREATED[k2]
+    return new_board, new_board != board, score, created
+
+
+def move_down(board):
+    t = _T0[board & ROW_MASK] | _T1[(board >> _SHIFT1) & ROW_MASK] | _T2[board >> _SHIFT2]
+    k0 = t & ROW_MASK
+    k1 = (t >> _SHIFT1) & ROW_MASK
+    k2 = t >> _SHIFT2
+    new_board = _T0[ROW_RIGHT[k0]] | _T1[ROW_RIGHT[k1]] | _T2[ROW_RIGHT[k2]]
+    score = ROW_RIGHT_SCORE[k0] + ROW_RIGHT_SCORE[k1] + ROW_RIGHT_SCORE[k2]
+    created = ROW_RIGHT_CREATED[k0] + ROW_RIGHT_CREATED[k1] + ROW_RIGHT_CREATED[k2]
+    return new_board, new_board != board, score, created
+
+
+MOVES = (move_left, move_right, move_up, move_down)
+
+
+def move(board, direction):
+    """Apply one of LEFT/RIGHT/UP/DOWN to a board"""
+    return MOVES[direction](board)
+
+
+def empty_mask(board):
+    """Mask with bit r * SIZE + c set for every empty cell (r, c)"""
+    return (ROW_EMPTY[board & ROW_MASK] | (ROW_EMPTY[(board >> _SHIFT1) & ROW_MASK] << SIZE)
+            | (ROW_EMPTY[board >> _SHIFT2] << (2 * SIZE)))
+
+
+def empty_cells(board):
+    """Return the bit shifts of every empty cell, in row-major order"""
+    return EMPTY_CELLS[empty_mask(board)]
+
+
+def add_new_tile(board, rng=random):
+    """Place a 2 (90%) or a 4 (10%) on a random empty cell.
+
+    Draws rng.choice then rng.random, so a seeded rng gives the same spawns
+    as move.add_new_tile on the matching grid.
+    """
+    cells = EMPTY_CELLS[empty_mask(board)]
+    if not cells:
+        return board
+    shift = rng.choice(cells)
+    return board | ((1 if rng.random() < 0.9 else 2) << shift)
+
+
+def legal_moves(board):
+    """Return a mask of the directions that change the board.
+
+    Bit 1 << d is set when direction d is legal (see LEFT_BIT..DOWN_BIT);
+    0 means the game is over.
+    """
+    t = _T0[board & ROW_MASK] | _T1[(board >> _SHIFT1) & ROW_MASK] | _T2[board >> _SHIFT2]
+    return (ROW_LEGAL[board & ROW_MASK] | ROW_LEGAL[(board >> _SHIFT1) & ROW_MASK]
+            | ROW_LEGAL[board >> _SHIFT2] | COL_LEGAL[t & ROW_MASK]
+            | COL_LEGAL[(t >> _SHIFT1) & ROW_MASK] | COL_LEGAL[t >> _SHIFT2])
+
+
+def can_move(board):
+    # The empty board has no legal move but is not a finished game
+    return legal_moves(board) != 0 or board == 0
+
+
+def game_over(board):
+    return not can_move(board)
+
+
+def max_exponent(board):
+    highest = 0
+    while board:
+        highest = max(highest, board & CELL_MASK)
+        board >>= CELL_BITS
+    return highest
+
+
+# Engines for other board sizes. A board of size n packs its n * n cells
+# the same way as above (4 bits per cell, row r at bit 4 * n * r), so an
+# n x n board needs 4 * n * n bits: 36 for 3x3, 64 for 4x4, 100 for 5x5.
+# 4 bit cells cap every size at MAX_EXPONENT (32768) and two 32768 tiles do
+# not merge. 3x3 never gets near it, but 4x4 and 5x5 can in principle, so
+# move.Board refuses to go past one 32768 tile (see engine_for).
+# Each size has its own row tables. A 4x4 row has 2 ** 16 values, few
+# enough to fill the tables in a fraction of a second when the engine is
+# first asked for; a 5x5 row has 2 ** 20, so those tables fill themselves
+# on first lookup and only the rows a game actually meets are computed.
+# Either way the 4x4 and 5x5 kernels are closures over the tables,
+# unrolled by hand like the 3x3 functions above; other sizes loop over the
+# rows (_generic_kernels).
+
+EAGER_ROW_BITS = 16  # row tables up to this many bits are built up front
+
+
+class _LazyTable(dict):
+    """Dict table that computes a missing entry with build(key) and keeps it"""
+
+    def __init__(self, build):
+        super().__init__()
+        self._build = build
+
+    def __missing__(self, key):
+        value = self[key] = self._build(key)
+        return value
+
+
+_TILE_EXPONENTS = {exponent_to_value(exponent): exponent for exponent in range(MAX_EXPONENT + 1)}
+
+
+def _row_key(values, size):
+    """Row key of a tuple of tile values; KeyError when it is not a row of tiles"""
+    if len(values) != size:
+        raise KeyError(values)
+    key = 0
+    for i, value in enumerate(values):
+        key |= _TILE_EXPONENTS[value] << (CELL_BITS * i)
+    return key
+
+
+def _build_eager_tables(size):
+    """Every row table of one size as lists (dict for the row keys).
+
+    Each table is derived from the one for the row without its first cell
+    (key >> CELL_BITS), which is always built before it, so only the left
+    slide itself costs a call per row.
+    """
+    row_bits = CELL_BITS * size
+    count = 1 << row_bits
+    top = CELL_BITS * (size - 1)
+    reversed_rows = [0] * count
+    spread = [0] * count  # row key placed into column 0
+    values = [(0,) * size] * count
+    empty = [(1 << size) - 1] * count
+    for key in range(1, count):
+        rest = key >> CELL_BITS
+        cell = key & CELL_MASK
+        reversed_rows[key] = (reversed_rows[rest] >> CELL_BITS) | (cell << top)
+        spread[key] = cell | (spread[rest] << row_bits)
+        values[key] = (exponent_to_value(cell),) + values[rest][:-1]
+        empty[key] = ((empty[rest] << 1) & ((1 << size) - 1)) | (0 if cell else 1)
+
+    left, left_score, left_created = (list(column) for column in
+                                      zip(*[_slide_row(key, size) for key in range(count)]))
+    right = [reversed_rows[left[key]] for key in reversed_rows]
+    right_score = [left_score[key] for key in reversed_rows]
+    right_created = [left_created[key] for key in reversed_rows]
+    legal = [(LEFT_BIT if left[key] != key else 0) | (RIGHT_BIT if right[key] != key else 0)
+             for key in range(count)]
+    # L/R move a row, S and C suffixes give its score and created tiles,
+    # T[r] spreads a row into column r, RL/CL are legal bits, E empty cells,
+    # V tile values and K keys by values
+    return {
+        "L": left, "R": right, "LS": left_score, "RS": right_score,
+        "LC": left_created, "RC": right_created,
+        "T": [spread] + [[board << (CELL_BITS * r) for board in spread] for r in range(1, size)],
+        "RL": legal, "CL": [bits << 2 for bits in legal], "E": empty, "V": values,
+        "K": {row: key for key, row in enumerate(values)},
+    }
+
+
+def _build_lazy_tables(size):
+    """The same tables as _build_eager_tables, filled on first lookup"""
+    left_rows = _LazyTable(lambda key: _slide_row(key, size))
+    right_rows = _LazyTable(lambda key: _slide_row(reverse_row(key, size), size))
+    legal = _LazyTable(lambda key: (LEFT_BIT if left_rows[key][0] != key else 0)
+                       | (RIGHT_BIT if reverse_row(right_rows[key][0], size) != key else 0))
+    return {
+        "L": _LazyTable(lambda key: left_rows[key][0]),
+        "R": _LazyTable(lambda key: reverse_row(right_rows[key][0], size)),
+        "LS": _LazyTable(lambda key: left_rows[key][1]),
+        "RS": _LazyTable(lambda key: right_rows[key][1]),
+        "LC": _LazyTable(lambda key: left_rows[key][2]),
+        "RC": _LazyTable(lambda key: right_rows[key][2]),
+        "T": [_LazyTable(lambda key, r=r: spread_col(key, r, size)) for r in range(size)],
+        "RL": legal,
+        "CL": _LazyTable(lambda key: legal[key] << 2),
+        "E": _LazyTable(lambda key: sum(
+            1 << i for i in range(size) if not (key >> (CELL_BITS * i)) & CELL_MASK)),
+        "V": _LazyTable(lambda key: tuple(
+            exponent_to_value((key >> (CELL_BITS * i)) & CELL_MASK) for i in range(size))),
+        "K": _LazyTable(lambda values: _row_key(values, size)),
+    }
+
+
+def _generic_kernels(size, tables):
+    """Move, transpose, legal-move, empty-mask, pack and unpack functions for
+    any size, as closures over its tables that loop over the rows"""
+    row_bits = CELL_BITS * size
+    row_mask = (1 << row_bits) - 1
+    shifts = tuple(row_bits * r for r in range(size))
+    empty_shifts = tuple(size * r for r in range(size))
+    spread = tables["T"]
+    row_legal, col_legal, row_empty = tables["RL"], tables["CL"], tables["E"]
+    row_values, row_keys = tables["V"], tables["K"]
+
+    def transpose(board):
+        t = 0
+        for column, shift in zip(spread, shifts):
+            t |= column[(board >> shift) & row_mask]
+        return t
+
+    def slide_rows(table, score_table, created_table):
+        def move(board):
+            keys = [(board >> shift) & row_mask for shift in shifts]
+            new_board = 0
+            for shift, key in zip(shifts, keys):
+                new_board |= table[key] << shift
+            return (new_board, new_board != board, sum(map(score_table.__getitem__, keys)),
+                    sum(map(created_table.__getitem__, keys)))
+        return move
+
+    def slide_columns(table, score_table, created_table):
+        # Columns become rows of the transposed board, then go back through
+        # the same spread tables.
+        def move(board):
+            t = transpose(board)
+            keys = [(t >> shift) & row_mask for shift in shifts]
+            new_board = 0
+            for column, key in zip(spread, keys):
+                new_board |= column[table[key]]
+            return (new_board, new_board != board, sum(map(score_table.__getitem__, keys)),
+                    sum(map(created_table.__getitem__, keys)))
+        return move
+
+    def legal_moves(board):
+        t = transpose(board)
+        legal = 0
+        for shift in shifts:
+            legal |= row_legal[(board >> shift) & row_mask] | col_legal[(t >> shift) & row_mask]
+        return legal
+
+    def empty_mask(board):
+        mask = 0
+        for shift, empty_shift in zip(shifts, empty_shifts):
+            mask |= row_empty[(board >> shift) & row_mask] << empty_shift
+        return mask
+
+    def unpack(board):
+        return [list(row_values[(board >> shift) & row_mask]) for shift in shifts]
+
+    def pack(grid):
+        if len(grid) != size:
+            raise ValueError(f"this engine packs {size}x{size} grids of tile values")
+        try:
+            board = 0
+            for shift, row in zip(shifts, grid):
+                board |= row_keys[(*row,)] << shift
+            return board
+        except KeyError:
+            raise ValueError(f"this engine packs {size}x{size} grids of tile values") from None
+
+    return {
+        "transpose": transpose,
+        "move_left": slide_rows(tables["L"], tables["LS"], tables["LC"]),
+        "move_right": slide_rows(tables["R"], tables["RS"], tables["RC"]),
+        "move_up": slide_columns(tables["L"], tables["LS"], tables["LC"]),
+        "move_down": slide_columns(tables["R"], tables["RS"], tables["RC"]),
+        "legal_moves": legal_moves,
+        "empty_mask": empty_mask,
+        "unpack": unpack,
+        "pack": pack,
+    }
+
+
+def _kernels_4x4(tables):
+    """The same functions as _generic_kernels, unrolled for 4x4 boards like
+    the 3x3 module functions (16 bit rows at bits 0, 16, 32 and 48)"""
+    T0, T1, T2, T3 = tables["T"]
+    RL, CL, E, V, K = tables["RL"], tables["CL"], tables["E"], tables["V"], tables["K"]
+
+    def transpose(board):
+        return (T0[board & 0xFFFF] | T1[(board >> 16) & 0xFFFF] | T2[(board >> 32) & 0xFFFF]
+                | T3[board >> 48])
+
+    def slide_rows(table, score_table, created_table):
+        def move(board):
+            k0 = board & 0xFFFF
+            k1 = (board >> 16) & 0xFFFF
+            k2 = (board >> 32) & 0xFFFF
+            k3 = board >> 48
+            new_board = table[k0] | (table[k1] << 16) | (table[k2] << 32) | (table[k3] << 48)
+            score = score_table[k0] + score_table[k1] + score_table[k2] + score_table[k3]
+            created = created_table[k0] + created_table[k1] + created_table[k2] + created_table[k3]
+            return new_board, new_board != board, score, created
+        return move
+
+    def slide_columns(table, score_table, created_table):
+        def move(board):
+            t = (T0[board & 0xFFFF] | T1[(board >> 16) & 0xFFFF] | T2[(board >> 32) & 0xFFFF]
+                 | T3[board >> 48])
+            k0 = t & 0xFFFF
+            k1 = (t >> 16) & 0xFFFF
+            k2 = (t >> 32) & 0xFFFF
+            k3 = t >> 48
+            new_board = T0[table[k0]] | T1[table[k1]] | T2[table[k2]] | T3[table[k3]]
+            score = score_table[k0] + score_table[k1] + score_table[k2] + score_table[k3]
+            created = created_table[k0] + created_table[k1] + created_table[k2] + created_table[k3]
+            return new_board, new_board != board, score, created
+        return move
+
+    def legal_moves(board):
+        t = (T0[board & 0xFFFF] | T1[(board >> 16) & 0xFFFF] | T2[(board >> 32) & 0xFFFF]
+             | T3[board >> 48])
+        return (RL[board & 0xFFFF] | RL[(board >> 16) & 0xFFFF] | RL[(board >> 32) & 0xFFFF]
+                | RL[board >> 48] | CL[t & 0xFFFF] | CL[(t >> 16) & 0xFFFF]
+                | CL[(t >> 32) & 0xFFFF] | CL[t >> 48])
+
+    def empty_mask(board):
+        return (E[board & 0xFFFF] | (E[(board >> 16) & 0xFFFF] << 4)
+                | (E[(board >> 32) & 0xFFFF] << 8) | (E[board >> 48] << 12))
+
+    def unpack(board):
+        return [list(V[board & 0xFFFF]), list(V[(board >> 16) & 0xFFFF]),
+                list(V[(board >> 32) & 0xFFFF]), list(V[board >> 48])]
+
+    def pack(grid):
+        try:
+            r0, r1, r2, r3 = grid
+            return K[(*r0,)] | (K[(*r1,)] << 16) | (K[(*r2,)] << 32) | (K[(*r3,)] << 48)
+        except (KeyError, ValueError):
+            raise ValueError("this engine packs 4x4 grids of tile values") from None
+
+    return {
+        "transpose": transpose,
+        "move_left": slide_rows(tables["L"], tables["LS"], tables["LC"]),
+        "move_right": slide_rows(tables["R"], tables["RS"], tables["RC"]),
+        "move_up": slide_columns(tables["L"], tables["LS"], tables["LC"]),
+        "move_down": slide_columns(tables["R"], tables["RS"], tables["RC"]),
+        "legal_moves": legal_moves,
+        "empty_mask": empty_mask,
+        "unpack": unpack,
+        "pack": pack,
+    }
+
+
+def _kernels_5x5(tables):
+    """The same functions as _generic_kernels, unrolled for 5x5 boards
+    (20 bit rows at bits 0, 20, 40, 60 and 80)"""
+    T0, T1, T2, T3, T4 = tables["T"]
+    RL, CL, E, V, K = tables["RL"], tables["CL"], tables["E"], tables["V"], tables["K"]
+
+    def transpose(board):
+        return (T0[board & 0xFFFFF] | T1[(board >> 20) & 0xFFFFF] | T2[(board >> 40) & 0xFFFFF]
+                | T3[(board >> 60) & 0xFFFFF] | T4[board >> 80])
+
+    def slide_rows(table, score_table, created_table):
+        def move(board):
+            k0 = board & 0xFFFFF
+            k1 = (board >> 20) & 0xFFFFF
+            k2 = (board >> 40) & 0xFFFFF
+            k3 = (board >> 60) & 0xFFFFF
+            k4 = board >> 80
+            new_board = (table[k0] | (table[k1] << 20) | (table[k2] << 40) | (table[k3] << 60)
+                         | (table[k4] << 80))
+            score = (score_table[k0] + score_table[k1] + score_table[k2] + score_table[k3]
+                     + score_table[k4])
+            created = (created_table[k0] + created_table[k1] + created_table[k2]
+                       + created_table[k3] + created_table[k4])
+            return new_board, new_board != board, score, created
+        return move
+
+    def slide_columns(table, score_table, created_table):
+        def move(board):
+            t = (T0[board & 0xFFFFF] | T1[(board >> 20) & 0xFFFFF] | T2[(board >> 40) & 0xFFFFF]
+                 | T3[(board >> 60) & 0xFFFFF] | T4[board >> 80])
+            k0 = t & 0xFFFFF
+            k1 = (t >> 20) & 0xFFFFF
+            k2 = (t >> 40) & 0xFFFFF
+            k3 = (t >> 60) & 0xFFFFF
+            k4 = t >> 80
+            new_board = T0[table[k0]] | T1[table[k1]] | T2[table[k2]] | T3[table[k3]] | T4[table[k4]]
+            score = (score_table[k0] + score_table[k1] + score_table[k2] + score_table[k3]
+                     + score_table[k4])
+            created = (created_table[k0] + created_table[k1] + created_table[k2]
+                       + created_table[k3] + created_table[k4])
+            return new_board, new_board != board, score, created
+        return move
+
+    def legal_moves(board):
+        t = (T0[board & 0xFFFFF] | T1[(board >> 20) & 0xFFFFF] | T2[(board >> 40) & 0xFFFFF]
+             | T3[(board >> 60) & 0xFFFFF] | T4[board >> 80])
+        return (RL[board & 0xFFFFF] | RL[(board >> 20) & 0xFFFFF] | RL[(board >> 40) & 0xFFFFF]
+                | RL[(board >> 60) & 0xFFFFF] | RL[board >> 80] | CL[t & 0xFFFFF]
+                | CL[(t >> 20) & 0xFFFFF] | CL[(t >> 40) & 0xFFFFF] | CL[(t >> 60) & 0xFFFFF]
+                | CL[t >> 80])
+
+    def empty_mask(board):
+        return (E[board & 0xFFFFF] | (E[(board >> 20) & 0xFFFFF] << 5)
+                | (E[(board >> 40) & 0xFFFFF] << 10) | (E[(board >> 60) & 0xFFFFF] << 15)
+                | (E[board >> 80] << 20))
+
+    def unpack(board):
+        return [list(V[board & 0xFFFFF]), list(V[(board >> 20) & 0xFFFFF]),
+                list(V[(board >> 40) & 0xFFFFF]), list(V[(board >> 60) & 0xFFFFF]),
+                list(V[board >> 80])]
+
+    def pack(grid):
+        try:
+            r0, r1, r2, r3, r4 = grid
+            return (K[(*r0,)] | (K[(*r1,)] << 20) | (K[(*r2,)] << 40) | (K[(*r3,)] << 60)
+                    | (K[(*r4,)] << 80))
+        except (KeyError, ValueError):
+            raise ValueError("this engine packs 5x5 grids of tile values") from None
+
+    return {
+        "transpose": transpose,
+        "move_left": slide_rows(tables["L"], tables["LS"], tables["LC"]),
+        "move_right": slide_rows(tables["R"], tables["RS"], tables["RC"]),
+        "move_up": slide_columns(tables["L"], tables["LS"], tables["LC"]),
+        "move_down": slide_columns(tables["R"], tables["RS"], tables["RC"]),
+        "legal_moves": legal_moves,
+        "empty_mask": empty_mask,
+        "unpack": unpack,
+        "pack": pack,
+    }
+
+
+# Sizes with hand-unrolled kernels; every other size uses _generic_kernels
+_UNROLLED_KERNELS = {4: _kernels_4x4, 5: _kernels_5x5}
+
+
+class Engine:
+    """Tables and move kernels for packed boards of one size.
+
+    Get one with engine_for(size) when a board is created and keep using
+    it: the kernels never check the size again. The 3x3 engine shares the
+    tables and unrolled functions above; other sizes get their own tables
+    and kernels built over them.
+    """
+
+    def __init__(self, size):
+        if size < 2:
+            raise ValueError("boards need at least 2x2 cells")
+        self.size = size
+        self.row_bits = CELL_BITS * size
+        self.row_mask = (1 << self.row_bits) - 1
+        self.shifts = tuple(self.row_bits * r for r in range(size))
+
+        if size == SIZE:
+            self.row_left, self.row_left_score, self.row_left_created = (
+                ROW_LEFT, ROW_LEFT_SCORE, ROW_LEFT_CREATED)
+            self.row_values = ROW_VALUES
+            self.row_keys = ROW_KEYS
+            self.row_legal = ROW_LEGAL
+            self.row_empty = ROW_EMPTY
+            self.spread = TRANSPOSE
+            self.empty_cell_shifts = EMPTY_CELLS
+            self.pack = pack
+            self.unpack = unpack
+            self.transpose = transpose
+            self.move_left, self.move_right, self.move_up, self.move_down = MOVES
+            self.legal_moves = legal_moves
+            self.empty_mask = empty_mask
+        else:
+            build = _build_eager_tables if self.row_bits <= EAGER_ROW_BITS else _build_lazy_tables
+            tables = build(size)
+            unrolled = _UNROLLED_KERNELS.get(size)
+            kernels = unrolled(tables) if unrolled else _generic_kernels(size, tables)
+            self.row_left, self.row_left_score, self.row_left_created = (
+                tables["L"], tables["LS"], tables["LC"])
+            self.row_values = tables["V"]
+            self.row_keys = tables["K"]  # row key by tuple of tile values
+            self.row_legal = tables["RL"]
+            self.row_empty = tables["E"]
+            # spread[r][key] places row key r into column r of an empty board
+            self.spread = tables["T"]
+            self.empty_cell_shifts = _LazyTable(
+                lambda mask: tuple(CELL_BITS * i for i in range(size * size) if mask >> i & 1))
+            self.pack = kernels["pack"]
+            self.unpack = kernels["unpack"]
+            self.transpose = kernels["transpose"]
+            self.move_left = kernels["move_left"]
+            self.move_right = kernels["move_right"]
+            self.move_up = kernels["move_up"]
+            self.move_down = kernels["move_down"]
+            self.legal_moves = kernels["legal_moves"]
+            self.empty_mask = kernels["empty_mask"]
+        self.moves = (self.move_left, self.move_right, self.move_up, self.move_down)
+
+    def move(self, board, direction):
+        return self.moves[direction](board)
+
+    def merge_row(self, key):
+        """Left move of one packed row: (new_key, score, created)"""
+        return self.row_left[key], self.row_left_score[key], self.row_left_created[key]
+
+    def empty_cells(self, board):
+        """Bit shifts of every empty cell, in row-major order"""
+        return self.empty_cell_shifts[self.empty_mask(board)]
+
+    def add_new_tile(self, board, rng=random):
+        """Place a 2 (90%) or a 4 (10%) on a random empty cell"""
+        cells = self.empty_cells(board)
+        if not cells:
+            return board
+        shift = rng.choice(cells)
+        return board | ((1 if rng.random() < 0.9 else 2) << shift)
+
+    def can_move(self, board):
+        return self.legal_moves(board) != 0 or board == 0
+
+    def game_over(self, board):
+        return not self.can_move(board)
+
+
+_ENGINES = {}
+
+
+def engine_for(size):
+    """The engine for size x size boards, built on first use.
+
+    Cells hold exponents up to MAX_EXPONENT, so a board can hold 32768
+    tiles but two of them never merge: on 4x4 and 5x5 a board with two
+    32768 tiles side by side gets wrong moves, legal_moves and game_over.
+    move.Board raises OverflowError before a game gets there.
+    """
+    engine = _ENGINES.get(size)
+    if engine is None:
+        engine = _ENGINES[size] = Engine(size)
+    return engine
@@ -0,0 +1,162 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import solver
+from tablebase import start_positions
+
+# Opening book for the 3x3 game.
+#
+# The first moves of a game keep running into the same few positions, so
+# the best move of every canonical position within DEFAULT_DEPTH moves of
+# a fresh game is searched once, offline, with a fixed-depth expectimax
+# (deeper than a live hint gets in its time budget).
+#
+# File layout (little endian):
+#   header: MAGIC, position count (Q), book depth (Q), search depth (Q)
+#   keys:   count canonical boards (Q), sorted
+#   moves:  count directions (B), the best move of each key's board
+# A lookup canonicalizes the board, binary-searches the memory-mapped keys
+# and maps the stored direction back through the board's symmetry.
+
+MAGIC = b"T2048BK1"
+HEADER = struct.Struct("<8sQQQ")
+DEFAULT_PATH = "opening_book.bin"
+DEFAULT_DEPTH = 6
+DEFAULT_SEARCH_DEPTH = 4
+
+
+def enumerate_positions(depth, log=None):
+    """Canonical boards with a legal move, reachable in at most depth moves"""
+    layer = start_positions()
+    positions = set(layer)
+    for ply in range(1, depth + 1):
+        following = set()
+        for board in layer:
+            for move in bitboard.MOVES:
+                after, moved, _, _ = move(board)
+                if not moved:
+                    continue
+                for shift in bitboard.empty_cells(after):
+                    following.add(bitboard.canonical(after | (1 << shift)))
+                    following.add(bitboard.canonical(after | (2 << shift)))
+        # A spawn raises the tile sum, so no board can come back in a later layer
+        layer = following
+        positions |= layer
+        if log:
+            log(f"move {ply}: {len(layer)} positions, {len(positions)} so far")
+    return sorted(board for board in positions if bitboard.legal_moves(board))
+
+
+def _search_chunk(boards, search_depth):
+    moves = array("B")
+    for board in boards:
+        values = solver.Expectimax().evaluate_moves(board, search_depth)
+        moves.append(max(values, key=values.get))
+    return moves
+
+
+def build(path=DEFAULT_PATH, depth=DEFAULT_DEPTH, search_depth=DEFAULT_SEARCH_DEPTH, workers=1, log=None):
+    """Search every book position and write the book file; returns its size"""
+    keys = array("Q", enumerate_positions(depth, log))
+    if log:
+        log(f"searching {len(keys)} positions at depth {search_depth}")
+    chunk = max(1, -(-len(keys) // (workers * 8)))
+    chunks = [keys[i:i + chunk] for i in range(0, len(keys), chunk)]
+    moves = array("B")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_moves in pool.map(_search_chunk, chunks, [search_depth] * len(chunks)):
+                moves.extend(chunk_moves)
+                if log:
+                    log(f"{len(moves)}/{len(keys)} searched")
+    else:
+        for boards in chunks:
+            moves.extend(_search_chunk(boards, search_depth))
+            if log:
+                log(f"{len(moves)}/{len(keys)} searched")
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), depth, search_depth))
+        keys.tofile(f)
+        moves.tofile(f)
+    return len(keys)
+
+
+class OpeningBook:
+    """Read-only view of a book file, memory-mapped"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not an opening book file") from None
+        if len(self._data) >= HEADER.size:
+            magic, self.count, self.depth, self.search_depth = HEADER.unpack_from(self._data, 0)
+        if len(self._data) < HEADER.size or magic != MAGIC or len(self._data) < HEADER.size + 9 * self.count:
+            self._data.close()
+            self._file.close()
+            raise ValueError(f"{path} is not an opening book file")
+        start = HEADER.size
+        self._keys = memoryview(self._data)[start:start + 8 * self.count].cast("Q")
+        self._moves = memoryview(self._data)[start + 8 * self.count:start + 9 * self.count]
+
+    def close(self):
+        self._keys.release()
+        self._moves.release()
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def best_move(self, board):
+        """Book move for a packed board, or None when it is not in the book"""
+        key, symmetry = bitboard.canonical_symmetry(board)
+        i = bisect_left(self._keys, key)
+        if i == self.count or self._keys[i] != key:
+            return None
+        return bitboard.map_direction(self._moves[i], symmetry)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the 3x3 opening book")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--path", default=DEFAULT_PATH, help="book file")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="moves from the start to cover")
+    parser.add_argument("--search-depth", type=int, default=DEFAULT_SEARCH_DEPTH)
+    parser.add_argument("--workers", type=int, default=1, help="processes to use, 0 for one per core")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.time()
+        workers = args.workers or os.cpu_count() or 1
+        count = build(args.path, args.depth, args.search_depth, workers, log=print)
+        print(f"Stored {count} positions in {args.path} ({time.time() - start:.0f}s)")
+    else:
+        with OpeningBook(args.path) as book:
+            print(f"{book.count} positions, {book.depth} moves deep, searched at depth {book.search_depth}")
+            boards = [book._keys[i] for i in range(0, book.count, max(1, book.count // 1000))]
+            start = time.perf_counter()
+            for board in boards:
+                book.best_move(board)
+            elapsed = time.perf_counter() - start
+            print(f"{1e6 * elapsed / len(boards):.1f} microseconds per lookup")
+
+
+if __name__ == "__main__":
+    main()
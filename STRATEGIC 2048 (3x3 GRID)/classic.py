@@ -1,43 +1,78 @@
 import pygame
 from button import Button
-from draw import draw_board
-from move import (
-    move_left, move_right, move_up, move_down,
-    initialize_grid, add_new_tile, game_over, can_move
-)
+from draw import draw_board, draw_board_well
+from move import Board, report_seed
+from bitboard import LEFT, RIGHT, UP, DOWN, DIRECTION_NAMES, SIZE
+from solver import best_move
+from ntuple import NTupleNetwork
+from book import OpeningBook
 from utils import load_high_score, save_high_score
+from fonts import get_font
+from renderer import Renderer, bake_layer
+from pacing import FramePacer
 
-def run_classic_mode(screen, font):
+HINT_TIME_LIMIT = 0.25  # seconds the solver may think per hint
+AUTOPLAY_INTERVAL = 150  # milliseconds between autoplay moves
+BOARD_SIZES = (3, 4, 5)  # the size button cycles through these
+
+_opening_book = None  # opened on first use and kept for the whole run
+
+def get_opening_book():
+    """The opening book (built with: python book.py build), or None without one.
+
+    The book is memory-mapped once per process rather than on every visit
+    to the mode; a missing or unreadable file is looked for again next time.
+    """
+    global _opening_book
+    if _opening_book is None:
+        try:
+            _opening_book = OpeningBook()
+        except (OSError, ValueError):
+            return None
+    return _opening_book
+
+def high_score_key(size):
+    """High score table key for a board size; 3x3 keeps the original key"""
+    return "classic" if size == 3 else f"classic_{size}x{size}"
+
+def run_classic_mode(screen, font, seed=None, size=3):
     background_image = pygame.image.load(r"C:/Users/cristian/Documents/STRATEGIC 2048 (3x3 GRID)/LOGO/backgroundclassic.png")
     background_image = pygame.transform.scale(background_image, (700, 700))
     
-    grid = initialize_grid(3)
-    grid = add_new_tile(grid)
-    grid = add_new_tile(grid)
-    score = 0
+    # Every game owns a seeded generator, so it can be replayed from
+    # (game.seed, moves) with move.replay; run with SHOW_SEEDS=1 to print
+    # the seeds. The Board keeps score, max tile and empty cells up to date
+    # as it goes.
+    game = Board(size, seed)
+    report_seed("Classic", game)
     
-    high_score = load_high_score("classic")
+    high_score = load_high_score(high_score_key(size))
     
     # History stack for undo functionality (stores multiple previous states)
-    move_history = []  # List of (grid, score) tuples
+    move_history = []  # List of Board.save() snapshots
     max_history = 5   # Maximum number of moves to remember
     
     home_btn = Button(None, (410, 190), "Home", font, "Black", "Red")
     restart_btn = Button(None, (520, 190), "Restart", font, "Black", "Red")
     undo_btn = Button(None, (630, 190), "Undo", font, "Black", "Red")
+    hint_btn = Button(None, (300, 190), "Hint", font, "Black", "Red")
+    hint_direction = None  # Solver suggestion for the current grid
+    # Hints come from the opening book when the position is in it and
+    # from a live search otherwise
+    opening_book = get_opening_book()
+    size_btn = Button(None, (190, 190), f"{size}x{size}", font, "Black", "Red")
     
     def restart():
         nonlocal move_history
         move_history.clear()  # Clear history on restart
-        new_grid = initialize_grid(3)
-        return add_new_tile(add_new_tile(new_grid)), 0
+        new_game = Board(size)
+        report_seed("Classic", new_game)
+        return new_game
     
-    def save_state(grid, score):
+    def save_state():
         """Save current state to history before making a move"""
         nonlocal move_history
-        # Create deep copy of the grid
-        grid_copy = [row[:] for row in grid]
-        move_history.append((grid_copy, score))
+        move_history.append(game.save())
         
         # Keep only the last max_history moves
         if len(move_history) > max_history:
@@ -47,20 +82,17 @@ def run_classic_mode(screen, font):
         """Undo the last move by restoring previous state from history"""
         nonlocal move_history
         if move_history:
-            # Get the last saved state
-            prev_grid, prev_score = move_history.pop()
-            return [row[:] for row in prev_grid], prev_score
-        else:
-            # No moves to undo, return current state
-            return [row[:] for row in grid], score
+            # Restore the last saved state; it includes the generator, so
+            # the game stays replayable from its seed
+            game.restore(move_history.pop())
     
     def can_undo():
         """Check if undo is available"""
         return len(move_history) > 0
     
-    def draw_score_boards(screen, current_score, high_score):
+    def draw_score_frames(screen):
         """
-        Draw separate score boards for current score and high score
+        Draw the score and high score boards with their labels, for the static layer
         """
         # Current Score Board
         current_score_x = 360
@@ -76,19 +108,10 @@ def run_classic_mode(screen, font):
                         (current_score_x, current_score_y, score_board_width, score_board_height),
                         border_radius=10)
         
-        # Current score text
-        score_font = pygame.font.Font(None, 28)
-        score_label_font = pygame.font.Font(None, 32)
-        
+        score_label_font = get_font(32)
         current_label = score_label_font.render("SCORE", True, (119, 110, 101))
-        current_value = score_font.render(str(current_score), True, (0, 0, 0))
-        
-        # Center the text in the current score board
         current_label_rect = current_label.get_rect(center=(current_score_x + score_board_width//2, current_score_y + 20))
-        current_value_rect = current_value.get_rect(center=(current_score_x + score_board_width//2, current_score_y + 50))
-        
         screen.blit(current_label, current_label_rect)
-        screen.blit(current_value, current_value_rect)
         
         # High Score Board
         high_score_x = 530
@@ -102,21 +125,35 @@ def run_classic_mode(screen, font):
                         (high_score_x, high_score_y, score_board_width, score_board_height),
                         border_radius=10)
         
-        # High score text
         high_label = score_label_font.render("BEST", True, (119, 110, 101))
+        high_label_rect = high_label.get_rect(center=(high_score_x + score_board_width//2, high_score_y + 20))
+        screen.blit(high_label, high_label_rect)
+    
+    def draw_score_values(screen, current_score, high_score):
+        """
+        Draw the current and high score inside the boards from draw_score_frames
+        """
+        current_score_x = 360
+        high_score_x = 530
+        score_y = 60
+        score_board_width = 150
+        score_board_height = 80
+        
+        score_font = get_font(28)
+        current_value = score_font.render(str(current_score), True, (0, 0, 0))
         high_value = score_font.render(str(high_score), True, (0, 0, 0))
         
-        # Center the text in the high score board
-        high_label_rect = high_label.get_rect(center=(high_score_x + score_board_width//2, high_score_y + 20))
-        high_value_rect = high_value.get_rect(center=(high_score_x + score_board_width//2, high_score_y + 50))
+        # Center the values under the labels
+        current_value_rect = current_value.get_rect(center=(current_score_x + score_board_width//2, score_y + 50))
+        high_value_rect = high_value.get_rect(center=(high_score_x + score_board_width//2, score_y + 50))
         
-        screen.blit(high_label, high_label_rect)
+        screen.blit(current_value, current_value_rect)
         screen.blit(high_value, high_value_rect)
         
         # Add a glow effect if current score equals high score
         if current_score == high_score and current_score > 0:
             pygame.draw.rect(screen, (255, 215, 0),
-                            (high_score_x - 2, high_score_y - 2, score_board_width + 4, score_board_height + 4),
+                            (high_score_x - 2, score_y - 2, score_board_width + 4, score_board_height + 4),
                             width=3, border_radius=12)
     
     def show_game_over_popup():
@@ -130,15 +167,15 @@ def run_classic_mode(screen, font):
         overlay.fill((0, 0, 0, 200))  # Semi-transparent black
         
         # Create the game over text
-        font_big = pygame.font.Font(None, 80)
-        font_medium = pygame.font.Font(None, 50)
-        font_small = pygame.font.Font(None, 40)
+        font_big = get_font(80)
+        font_medium = get_font(50)
+        font_small = get_font(40)
         
         text1 = font_big.render("Game Over!", True, (255, 100, 100))  # Red color
-        text2 = font_medium.render(f"Final Score: {score}", True, (255, 255, 255))
+        text2 = font_medium.render(f"Final Score: {game.score}", True, (255, 255, 255))
         
         # Check if it's a new high score
-        if score >= high_score:
+        if game.score >= high_score:
             text3 = font_medium.render("NEW HIGH SCORE!", True, (255, 215, 0))  # Gold color
         else:
             text3 = font_medium.render(f"High Score: {high_score}", True, (255, 255, 255))
@@ -149,7 +186,7 @@ def run_classic_mode(screen, font):
         text3_rect = text3.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 - 20))
         
         # Create buttons with better styling
-        button_font = pygame.font.Font(None, 36)
+        button_font = get_font(36)
         
         # Determine which buttons to show based on undo availability
         if can_undo():
@@ -171,11 +208,11 @@ def run_classic_mode(screen, font):
         
         # Animation variables
         animation_time = 0
-        clock = pygame.time.Clock()
+        pacer = FramePacer()
         
         # Display the message and handle input
         while True:
-            animation_time += clock.get_time() / 1000.0  # Convert to seconds
+            animation_time += pacer.get_time() / 1000.0  # Convert to seconds
             
             # Create pulsing effect for "Game Over" text
             pulse = abs(math.sin(animation_time * 2)) * 0.3 + 0.7  # Pulse between 0.7 and 1.0
@@ -195,7 +232,7 @@ def run_classic_mode(screen, font):
             screen.blit(text3, text3_rect)
             
             # Handle events
-            for event in pygame.event.get():
+            for event in pacer.events("popup"):
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     return "home"
@@ -226,7 +263,7 @@ def run_classic_mode(screen, font):
                 btn.update(screen)
             
             # Add keyboard hints
-            hint_font = pygame.font.Font(None, 24)
+            hint_font = get_font(24)
             if can_undo():
                 hint_text = hint_font.render("Press R to Restart, U to Undo, ESC for Home", True, (150, 150, 150))
             else:
@@ -235,7 +272,6 @@ def run_classic_mode(screen, font):
             screen.blit(hint_text, hint_rect)
             
             pygame.display.flip()
-            clock.tick(60)
     
     def show_2048_achievement():
         """
@@ -246,9 +282,9 @@ def run_classic_mode(screen, font):
         overlay.fill((0, 0, 0, 200))  # Semi-transparent black
         
         # Create the achievement text
-        font_big = pygame.font.Font(None, 80)
-        font_medium = pygame.font.Font(None, 50)
-        font_small = pygame.font.Font(None, 40)
+        font_big = get_font(80)
+        font_medium = get_font(50)
+        font_small = get_font(40)
         
         text1 = font_big.render("Congratulations!", True, (255, 215, 0))  # Gold color
         text2 = font_medium.render("You reached 2048!", True, (255, 255, 255))
@@ -260,11 +296,11 @@ def run_classic_mode(screen, font):
         text3_rect = text3.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 - 20))
         
         # Create continue button
-        button_font = pygame.font.Font(None, 36)
+        button_font = get_font(36)
         continue_btn = Button(None, (screen.get_width() // 2, screen.get_height() // 2 + 80), 
                             "Continue Playing", button_font, "Black", "LightGreen")
         
-        clock = pygame.time.Clock()
+        pacer = FramePacer()
         
         # Display the message and handle input
         while True:
@@ -281,7 +317,7 @@ def run_classic_mode(screen, font):
             screen.blit(text3, text3_rect)
             
             # Handle events
-            for event in pygame.event.get():
+            for event in pacer.events("popup"):
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     return False
@@ -300,18 +336,61 @@ def run_classic_mode(screen, font):
             continue_btn.update(screen)
             
             pygame.display.flip()
-            clock.tick(60)
     
-    clock = pygame.time.Clock()
-    achieved_2048 = False  # Track if player has reached 2048
+    key_directions = {
+        pygame.K_LEFT: LEFT,
+        pygame.K_RIGHT: RIGHT,
+        pygame.K_UP: UP,
+        pygame.K_DOWN: DOWN,
+    }
     
-    while True:
-        screen.fill((255, 255, 255))
-        screen.blit(background_image, (0, 0))
+    direction_keys = {direction: key for key, direction in key_directions.items()}
+    
+    # P toggles an autoplay demo driven by the trained n-tuple network
+    autoplay_network = None
+    autoplay = False
+    next_autoplay = 0
+    
+    def draw_static(surface):
+        surface.fill((255, 255, 255))
+        surface.blit(background_image, (0, 0))
+        draw_score_frames(surface)
+        draw_board_well(surface, size, size)
+    
+    def draw_frame(screen):
+        # Background, empty board and score box frames come from the static layer
+        screen.blit(static_layer, (0, 0))
         
         # Draw separate score boards
-        draw_score_boards(screen, score, high_score)
+        draw_score_values(screen, game.score, high_score)
         
+        # Draw the game board without the built-in score display
+        draw_board(
+            screen, game.grid, game.score, None, font,
+            is_time=False, high_score=high_score,
+            home_btn=home_btn, restart_btn=restart_btn, undo_btn=undo_btn,
+            show_score=False,  # Disable built-in score display
+            board_well=True
+        )
+        size_btn.update(screen)
+        if size == SIZE:  # the solver searches 3x3 boards only
+            hint_btn.update(screen)
+        
+        if hint_direction is not None:
+            hint_font = get_font(40)
+            hint_text = hint_font.render(f"Hint: {DIRECTION_NAMES[hint_direction]}", True, (0, 0, 0))
+            screen.blit(hint_text, hint_text.get_rect(center=(screen.get_width() // 2, 650)))
+        elif autoplay:
+            hint_font = get_font(40)
+            hint_text = hint_font.render("Autoplay (P to stop)", True, (0, 0, 0))
+            screen.blit(hint_text, hint_text.get_rect(center=(screen.get_width() // 2, 650)))
+    
+    pacer = FramePacer()
+    renderer = Renderer(screen)
+    static_layer = bake_layer(screen, draw_static)  # redrawn when the size changes
+    achieved_2048 = False  # Track if player has reached 2048
+    
+    while True:
         # Update undo button appearance based on availability
         if can_undo():
             undo_btn.rect_color = "LightGray"
@@ -320,22 +399,35 @@ def run_classic_mode(screen, font):
             undo_btn.rect_color = "DarkGray"
             undo_btn.text_color = "Gray"
         
-        # Draw the game board without the built-in score display
-        draw_board(
-            screen, grid, score, None, font,
-            is_time=False, high_score=high_score,
-            home_btn=home_btn, restart_btn=restart_btn, undo_btn=undo_btn,
-            show_score=False  # Disable built-in score display
-        )
+        # Only what changed since the last frame is redrawn: the moved
+        # cells, the scores, buttons and the hint line
+        renderer.track_board(game.grid)
+        renderer.track("scores", (358, 58, 324, 84), (game.score, high_score))
+        renderer.track_button("home", home_btn)
+        renderer.track_button("restart", restart_btn)
+        renderer.track_button("undo", undo_btn)
+        renderer.track_button("size", size_btn)
+        renderer.track_button("hint", hint_btn, size == SIZE)
+        renderer.track("hint_text", (0, 625, screen.get_width(), 50), (hint_direction, autoplay))
+        renderer.present(draw_frame)
+        
+        # Autoplay feeds the network's move in as an arrow key press
+        if autoplay and pygame.time.get_ticks() >= next_autoplay:
+            direction = autoplay_network.best_move(game.board)
+            if direction is not None:
+                pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=direction_keys[direction]))
+            next_autoplay = pygame.time.get_ticks() + AUTOPLAY_INTERVAL
         
         # Check for 2048 achievement
-        max_tile = max(max(row) for row in grid)
-        if not achieved_2048 and max_tile >= 2048:
+        if not achieved_2048 and game.max_tile >= 2048:
             achieved_2048 = True
             if not show_2048_achievement():
                 return "home"
+            renderer.invalidate()  # the popup covered the screen
         
-        for event in pygame.event.get():
+        # Between moves the loop sleeps until the player acts; autoplay
+        # needs it awake to send its moves
+        for event in pacer.events("autoplay" if autoplay else None):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 return "home"
@@ -343,50 +435,70 @@ def run_classic_mode(screen, font):
                 if home_btn.checkforinput(event.pos):
                     return "home"
                 elif restart_btn.checkforinput(event.pos):
-                    grid, score = restart()
+                    game = restart()
                     achieved_2048 = False  # Reset achievement flag
+                    hint_direction = None
                 elif undo_btn.checkforinput(event.pos) and can_undo():
-                    grid, score = undo()
+                    undo()
+                    hint_direction = None
+                elif size_btn.checkforinput(event.pos):
+                    # Switch to the next board size and start a new game on it
+                    size = BOARD_SIZES[(BOARD_SIZES.index(size) + 1) % len(BOARD_SIZES)]
+                    size_btn = Button(None, (190, 190), f"{size}x{size}", font, "Black", "Red")
+                    high_score = load_high_score(high_score_key(size))
+                    static_layer = bake_layer(screen, draw_static)
+                    game = restart()
+                    achieved_2048 = False
+                    hint_direction = None
+                    autoplay = False
+                elif hint_btn.checkforinput(event.pos) and size == SIZE:
+                    hint_direction = opening_book.best_move(game.board) if opening_book else None
+                    if hint_direction is None:
+                        hint_direction = best_move(game.board, HINT_TIME_LIMIT)
             elif event.type == pygame.KEYDOWN:
-                moved = False
-                gained = 0
+                if event.key == pygame.K_p and size == SIZE:
+                    if autoplay_network is None:
+                        try:
+                            autoplay_network = NTupleNetwork.load()
+                        except (OSError, ValueError) as e:
+                            print(f"No usable n-tuple weights ({e}); train them with: python ntuple.py train")
+                            continue
+                    autoplay = not autoplay
+                    continue
+                
+                # Ignore arrows that would not change the board, so no
+                # state is saved for them
+                direction = key_directions.get(event.key)
+                if direction is None or not game.legal_moves() & (1 << direction):
+                    continue
                 
                 # Save state before making a move
-                if event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
-                    save_state(grid, score)
+                save_state()
+                hint_direction = None
                 
-                if event.key == pygame.K_LEFT:
-                    grid, moved, gained = move_left(grid)
-                elif event.key == pygame.K_RIGHT:
-                    grid, moved, gained = move_right(grid)
-                elif event.key == pygame.K_UP:
-                    grid, moved, gained = move_up(grid)
-                elif event.key == pygame.K_DOWN:
-                    grid, moved, gained = move_down(grid)
+                # Slides the board and spawns the next tile
+                try:
+                    moved, gained, _ = game.move(direction)
+                    finished = moved and not game.legal_moves()
+                except OverflowError:
+                    # A second 32768 tile is more than a packed board holds
+                    # (4x4 and 5x5 only), so the game ends on this board
+                    moved, finished = True, True
                 
                 if moved:
-                    score += gained
-                    grid = add_new_tile(grid)
-                    
                     # Update high score
-                    if score > high_score:
-                        high_score = score
-                        save_high_score("classic", high_score)
+                    if game.score > high_score:
+                        high_score = game.score
+                        save_high_score(high_score_key(size), high_score)
                     
-                    # Check for game over
-                    if game_over(grid) or not can_move(grid):
+                    # Check for game over (no legal direction left)
+                    if finished:
                         result = show_game_over_popup()
+                        renderer.invalidate()
                         if result == "retry":
-                            grid, score = restart()
+                            game = restart()
                             achieved_2048 = False  # Reset achievement flag
                         elif result == "undo" and can_undo():
-                            grid, score = undo()
+                            undo()
                         elif result == "home":
                             return "home"
-                else:
-                    # If no move was made, remove the saved state
-                    if move_history:
-                        move_history.pop()
-        
-        pygame.display.flip()
-        clock.tick(60)
@@ -1,4 +1,102 @@
 import pygame
+from fonts import get_font
+
+BOARD_PIXELS = 370  # width of the tile area: three 120px tiles and two gaps
+TILE_SPACING = 5
+BOARD_TOP = 240
+
+TILE_COLORS = {
+    0: (205, 193, 180),
+    2: (238, 228, 218),
+    4: (237, 224, 200),
+    8: (242, 177, 121),
+    16: (245, 149, 99),
+    32: (246, 124, 95),
+    64: (246, 94, 59),
+    128: (237, 207, 114),
+    256: (237, 204, 97),
+    512: (237, 200, 80),
+    1024: (237, 197, 63),
+    2048: (237, 194, 46),
+    4096: (237, 199, 50),
+    # Beyond 4096 (reachable on the larger boards) the tiles turn dark
+    8192: (60, 58, 50),
+    16384: (70, 60, 90),
+    32768: (50, 80, 110),
+}
+BIG_TILE_COLOR = (40, 40, 40)  # anything larger still
+
+# Text colors for better contrast
+TEXT_COLORS = {
+    0: (119, 110, 101),
+    2: (119, 110, 101),
+    4: (119, 110, 101),
+}
+LIGHT_TEXT_COLOR = (249, 246, 242)
+
+# Rendered tiles by (value, tile_size); each is drawn once and then only
+# blitted
+_tile_sprites = {}
+
+
+def tile_sprite(value, tile_size):
+    """Surface of one tile: fill, border and number"""
+    sprite = _tile_sprites.get((value, tile_size))
+    if sprite is not None:
+        return sprite
+
+    # Create square tile (no border_radius for square corners)
+    sprite = pygame.Surface((tile_size, tile_size))
+    rect = sprite.get_rect()
+    sprite.fill(TILE_COLORS.get(value, BIG_TILE_COLOR))  # Fill tile
+    pygame.draw.rect(sprite, (0, 0, 0), rect, 2)  # Border (square)
+
+    if value != 0:
+        # Use appropriate text color for contrast
+        font_color = TEXT_COLORS.get(value, LIGHT_TEXT_COLOR)
+
+        # Adjust font size based on tile value for better fit
+        if value < 100:
+            font_size = 55
+        elif value < 1000:
+            font_size = 50
+        elif value < 10000:
+            font_size = 45
+        else:
+            font_size = 36
+        tile_font = get_font(font_size * tile_size // 120)
+        value_text = tile_font.render(str(value), True, font_color)
+        sprite.blit(value_text, value_text.get_rect(center=rect.center))
+
+    _tile_sprites[(value, tile_size)] = sprite
+    return sprite
+
+def board_layout(screen, rows, cols, board_left=None, board_top=None):
+    """(board_left, board_top, tile_size) of a board as draw_board places it"""
+    # Larger boards shrink their tiles to keep the board the same size
+    tile_size = (BOARD_PIXELS - (max(cols, 1) - 1) * TILE_SPACING) // max(cols, 1)
+
+    grid_width = cols * tile_size + (cols - 1) * TILE_SPACING
+
+    if board_left is None:
+        board_left = (screen.get_width() - grid_width) // 2
+    if board_top is None:
+        board_top = BOARD_TOP
+    return board_left, board_top, tile_size
+
+def board_cell_rects(screen, rows, cols, board_left=None, board_top=None):
+    """(row, col, rect) of every cell of the board"""
+    board_left, board_top, tile_size = board_layout(screen, rows, cols, board_left, board_top)
+    step = tile_size + TILE_SPACING
+    return [(row, col, pygame.Rect(board_left + col * step, board_top + row * step, tile_size, tile_size))
+            for row in range(rows) for col in range(cols)]
+
+def draw_board_well(screen, rows, cols, board_left=None, board_top=None):
+    """Draw every cell of the board empty, for a static layer"""
+    _, _, tile_size = board_layout(screen, rows, cols, board_left, board_top)
+    empty = tile_sprite(0, tile_size)
+    for _, _, rect in board_cell_rects(screen, rows, cols, board_left, board_top):
+        screen.blit(empty, rect)
 
 def draw_board(
     screen, grid, score, extra_info, font,
@@ -7,26 +105,14 @@ def draw_board(
     home_btn=None, restart_btn=None, undo_btn=None,
     show_score=True,
     board_left=None, board_top=None,
-    logo_img=None  # New argument for logo image surface
+    logo_img=None,  # New argument for logo image surface
+    board_well=False  # empty cells are already drawn by draw_board_well
 ):
-    tile_size = 120
-    tile_spacing = 5
-    default_top_padding = 200
-
     rows = len(grid)
     cols = len(grid[0]) if rows > 0 else 0
+    board_left, board_top, tile_size = board_layout(screen, rows, cols, board_left, board_top)
 
-    grid_width = cols * tile_size + (cols - 1) * tile_spacing
-    grid_height = rows * tile_size + (rows - 1) * tile_spacing
-
-    screen_width, screen_height = screen.get_size()
-
-    if board_left is None:
-        board_left = (screen_width - grid_width) // 2
-    if board_top is None:
-        board_top = default_top_padding + 40
-
-    small_font = pygame.font.Font(None, 36)
+    small_font = get_font(36)
     
     if logo_img:
         logo_pos = (20, 20)
@@ -34,67 +120,11 @@ def draw_board(
     
     # Score box section removed as requested
     
-    tile_colors = {
-        0: (205, 193, 180),
-        2: (238, 228, 218),
-        4: (237, 224, 200),
-        8: (242, 177, 121),
-        16: (245, 149, 99),
-        32: (246, 124, 95),
-        64: (246, 94, 59),
-        128: (237, 207, 114),
-        256: (237, 204, 97),
-        512: (237, 200, 80),
-        1024: (237, 197, 63),
-        2048: (237, 194, 46),
-        4096: (237, 199, 50),
-    }
-
-    # Text colors for better contrast
-    text_colors = {
-        0: (119, 110, 101),
-        2: (119, 110, 101),
-        4: (119, 110, 101),
-        8: (249, 246, 242),
-        16: (249, 246, 242),
-        32: (249, 246, 242),
-        64: (249, 246, 242),
-        128: (249, 246, 242),
-        256: (249, 246, 242),
-        512: (249, 246, 242),
-        1024: (249, 246, 242),
-        2048: (249, 246, 242),
-        4096: (249, 246, 242),
-    }
-
-    # Draw the game grid with square tiles
-    for row in range(rows):
-        for col in range(cols):
-            value = grid[row][col]
-            color = tile_colors.get(value, (60, 58, 50))
-            x = board_left + col * (tile_size + tile_spacing)
-            y = board_top + row * (tile_size + tile_spacing)
-            
-            # Create square tile (no border_radius for square corners)
-            rect = pygame.Rect(x, y, tile_size, tile_size)
-            pygame.draw.rect(screen, color, rect)  # Fill tile
-            pygame.draw.rect(screen, (0, 0, 0), rect, 2)  # Border (square)
-
-            if value != 0:
-                # Use appropriate text color for contrast
-                font_color = text_colors.get(value, (249, 246, 242))
-                
-                # Adjust font size based on tile value for better fit
-                if value < 100:
-                    tile_font = pygame.font.Font(None, 55)
-                elif value < 1000:
-                    tile_font = pygame.font.Font(None, 50)
-                else:
-                    tile_font = pygame.font.Font(None, 45)
-                
-                value_text = tile_font.render(str(value), True, font_color)
-                text_rect = value_text.get_rect(center=rect.center)
-                screen.blit(value_text, text_rect)
+    # Draw the game grid from the cached tile sprites
+    for row, col, rect in board_cell_rects(screen, rows, cols, board_left, board_top):
+        value = grid[row][col]
+        if value or not board_well:
+            screen.blit(tile_sprite(value, tile_size), rect)
 
     # Draw adventure targets info box (if provided) - also with square corners
     if adventure_targets and tile_created_count is not None:
@@ -0,0 +1,20 @@
+import pygame
+
+# Shared font registry. Loading a font parses the font file, so every
+# render path asks here instead of building pygame.font.Font objects per
+# frame; each (path, size) is loaded once, on first use.
+
+_fonts = {}
+
+
+def get_font(size, path=None):
+    """Font of the given size; path None means pygame's default font"""
+    font = _fonts.get((path, size))
+    if font is None:
+        font = _fonts[(path, size)] = pygame.font.Font(path, size)
+    return font
+
+
+def clear():
+    """Forget every loaded font, e.g. after pygame.quit() and a new init"""
+    _fonts.clear()
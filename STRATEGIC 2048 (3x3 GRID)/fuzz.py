@@ -0,0 +1,382 @@
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import move
+from movecache import MoveCache
+
+# Differential fuzzer for the move engines.
+#
+# Random and adversarial boards are played through a plain list
+# implementation of the rules (the reference below, written the way the
+# original move.py was) and through every accelerated backend. The new
+# grid, the moved flag, the score and the created tiles of all four
+# directions are compared, as are the legal-move mask and the game-over
+# flag. Mismatches are shrunk to the smallest board that still fails.
+#
+# Tiles stay below 2 ** MAX_EXPONENT: the packed engines store exponents
+# in 4 bits, so two 32768s do not merge there, while the reference would
+# merge them.
+
+DEFAULT_BOARDS = 100000
+DEFAULT_SIZES = (3, 4, 5)
+MAX_FAILURES_PER_CHUNK = 20
+CHUNKS_PER_WORKER = 4
+LEGAL = "legal"  # check name for the legal mask / game over comparison
+
+
+# Reference implementation
+
+def reference_merge_row(row):
+    """Slide and merge one row to the left: (new_row, score, created values)"""
+    tiles = [value for value in row if value]
+    new_row = []
+    score = 0
+    created = []
+    i = 0
+    while i < len(tiles):
+        if i + 1 < len(tiles) and tiles[i] == tiles[i + 1]:
+            new_row.append(tiles[i] * 2)
+            score += tiles[i] * 2
+            created.append(tiles[i] * 2)
+            i += 2
+        else:
+            new_row.append(tiles[i])
+            i += 1
+    return new_row + [0] * (len(row) - len(new_row)), score, created
+
+
+def reference_move(grid, direction):
+    """(new grid, moved, score, sorted created values) for one direction"""
+    if direction in (bitboard.UP, bitboard.DOWN):
+        grid = [list(col) for col in zip(*grid)]
+    reverse = direction in (bitboard.RIGHT, bitboard.DOWN)
+    new_grid = []
+    score = 0
+    created = []
+    for row in grid:
+        new_row, gained, made = reference_merge_row(row[::-1] if reverse else row)
+        new_grid.append(new_row[::-1] if reverse else new_row)
+        score += gained
+        created += made
+    moved = new_grid != grid
+    if direction in (bitboard.UP, bitboard.DOWN):
+        new_grid = [list(col) for col in zip(*new_grid)]
+    return new_grid, moved, score, tuple(sorted(created))
+
+
+def reference_legal(grid):
+    """(legal mask, game over) for a grid"""
+    mask = 0
+    for direction in bitboard.DIRECTIONS:
+        if reference_move(grid, direction)[1]:
+            mask |= 1 << direction
+    return mask, mask == 0 and any(any(row) for row in grid)
+
+
+# Backends. Each entry is (sizes or None for any size, move function,
+# legal function); the functions take a list of same-size grids and return
+# one result per grid in the reference's format. created is None when a
+# backend does not report it.
+
+def _created(created):
+    return tuple(sorted(value for value, count in bitboard.created_values(created) for _ in range(count)))
+
+
+def _move_module(grids, direction):
+    results = []
+    for grid in grids:
+        new_grid, moved, score, created = move.MOVES[direction]([row[:] for row in grid])
+        results.append((new_grid, moved, score, _created(created)))
+    return results
+
+
+def _move_module_legal(grids):
+    return [(move.legal_moves(grid), move.game_over(grid)) for grid in grids]
+
+
+def _engine(grids, direction):
+    engine = bitboard.engine_for(len(grids[0]))
+    results = []
+    for grid in grids:
+        board, moved, score, created = engine.moves[direction](engine.pack(grid))
+        results.append((engine.unpack(board), moved, score, _created(created)))
+    return results
+
+
+def _engine_legal(grids):
+    engine = bitboard.engine_for(len(grids[0]))
+    return [(engine.legal_moves(engine.pack(grid)), engine.game_over(engine.pack(grid))) for grid in grids]
+
+
+def _bitboard(grids, direction):
+    results = []
+    for grid in grids:
+        board, moved, score, created = bitboard.MOVES[direction](bitboard.pack(grid))
+        results.append((bitboard.unpack(board), moved, score, _created(created)))
+    return results
+
+
+def _bitboard_legal(grids):
+    return [(bitboard.legal_moves(bitboard.pack(grid)), bitboard.game_over(bitboard.pack(grid))) for grid in grids]
+
+
+def _batch(grids, direction):
+    import batch
+    new_grids, moved, scores = batch.move_boards(grids, direction)
+    return [(new_grid, bool(m), int(score), None)
+            for new_grid, m, score in zip(new_grids.tolist(), moved, scores)]
+
+
+def _batch_legal(grids):
+    import batch
+    legal, terminal = batch.legal_moves(grids)
+    return [(sum(1 << d for d in bitboard.DIRECTIONS if row[d]), bool(over))
+            for row, over in zip(legal, terminal)]
+
+
+_CACHE_SIZE = 256  # small, so runs go through evictions as well as hits
+_caches = {}
+
+
+def _cache(grids, direction):
+    # Every board is looked up twice: a miss, then a hit that must agree
+    size = len(grids[0])
+    cache = _caches.get(size)
+    if cache is None:
+        cache = _caches[size] = MoveCache(bitboard.engine_for(size), _CACHE_SIZE)
+    results = []
+    for grid in grids:
+        board = cache.engine.pack(grid)
+        first = cache.move(board, direction)
+        result = cache.move(board, direction)
+        if result != first:
+            result = (0, False, -1, 0)
+        new_board, moved, score, created = result
+        results.append((cache.engine.unpack(new_board), moved, score, _created(created)))
+    return results
+
+
+BACKENDS = {
+    "move": (None, _move_module, _move_module_legal),
+    "engine": (None, _engine, _engine_legal),
+    "bitboard": ((bitboard.SIZE,), _bitboard, _bitboard_legal),
+    "batch": ((bitboard.SIZE,), _batch, _batch_legal),
+    "cache": (None, _cache, _engine_legal),
+}
+
+
+def available_backends():
+    """Backend names whose dependencies import (batch needs NumPy)"""
+    names = []
+    for name in BACKENDS:
+        if name == "batch":
+            try:
+                import numpy  # noqa: F401
+            except ImportError:
+                continue
+        names.append(name)
+    return names
+
+
+# Board generators
+
+def _exponents(rng, size, kind):
+    cells = size * size
+    top = bitboard.MAX_EXPONENT - 1
+    if kind == "uniform":
+        return [rng.randint(0, top) for _ in range(cells)]
+    if kind == "sparse":
+        return [rng.randint(1, 4) if rng.random() < 0.2 else 0 for _ in range(cells)]
+    if kind == "low":
+        return [rng.randint(0, 3) for _ in range(cells)]
+    if kind == "full":
+        return [rng.randint(1, 4) for _ in range(cells)]
+    if kind == "runs":
+        # Long runs of equal tiles, along rows or columns, with a few gaps
+        exponents = []
+        for _ in range(size):
+            value = rng.randint(1, top)
+            exponents += [0 if rng.random() < 0.15 else value for _ in range(size)]
+        if rng.random() < 0.5:
+            exponents = [exponents[c * size + r] for r in range(size) for c in range(size)]
+        return exponents
+    # "extreme": the smallest and largest tiles the engines allow
+    return [rng.choice((0, 1, top - 1, top)) for _ in range(cells)]
+
+
+GENERATORS = ("uniform", "sparse", "low", "full", "runs", "extreme")
+
+
+def random_grid(rng, size):
+    exponents = _exponents(rng, size, rng.choice(GENERATORS))
+    return [[bitboard.exponent_to_value(e) for e in exponents[r * size:(r + 1) * size]] for r in range(size)]
+
+
+# Checking
+
+def _compare(backend, grids):
+    """Yield (grid, check, expected, got) for every mismatch of backend"""
+    _, move_function, legal_function = BACKENDS[backend]
+    for direction in bitboard.DIRECTIONS:
+        for grid, got in zip(grids, move_function(grids, direction)):
+            expected = reference_move(grid, direction)
+            if got[3] is None:
+                expected = expected[:3] + (None,)
+            if tuple(got) != expected:
+                yield grid, direction, expected, tuple(got)
+    for grid, got in zip(grids, legal_function(grids)):
+        expected = reference_legal(grid)
+        if tuple(got) != expected:
+            yield grid, LEGAL, expected, tuple(got)
+
+
+def _supports(backend, size):
+    sizes = BACKENDS[backend][0]
+    return sizes is None or size in sizes
+
+
+def _fuzz_chunk(seed, chunk, count, sizes, backends):
+    """Worker: check count boards; returns (boards checked, failures)"""
+    rng = random.Random(f"{seed}-{chunk}")
+    grids = {size: [] for size in sizes}
+    for _ in range(count):
+        size = rng.choice(sizes)
+        grids[size].append(random_grid(rng, size))
+    failures = []
+    for size, size_grids in grids.items():
+        if not size_grids:
+            continue
+        for backend in backends:
+            if not _supports(backend, size):
+                continue
+            for grid, check, expected, got in _compare(backend, size_grids):
+                failures.append((backend, grid, check, expected, got))
+                if len(failures) >= MAX_FAILURES_PER_CHUNK:
+                    return count, failures
+    return count, failures
+
+
+def _still_fails(backend, grid, check):
+    for _, failed_check, _, _ in _compare(backend, [grid]):
+        if failed_check == check:
+            return True
+    return False
+
+
+def _board_size(grid):
+    """Ordering for counterexamples: fewer cells, fewer tiles, smaller tiles"""
+    return len(grid), sum(1 for row in grid for value in row if value), sum(value for row in grid for value in row)
+
+
+def shrink(backend, grid, check):
+    """Greedily simplify a failing grid while the same check keeps failing"""
+    grid = [row[:] for row in grid]
+    improved = True
+    while improved:
+        improved = False
+        candidates = []
+        size = len(grid)
+        if size > 2 and _supports(backend, size - 1):
+            candidates.append([row[:-1] for row in grid[:-1]])
+            candidates.append([row[1:] for row in grid[1:]])
+        for r in range(size):
+            for c in range(size):
+                if grid[r][c]:
+                    for value in (0, grid[r][c] // 2 if grid[r][c] > 2 else 0):
+                        candidate = [row[:] for row in grid]
+                        candidate[r][c] = value
+                        candidates.append(candidate)
+        for candidate in candidates:
+            if _board_size(candidate) < _board_size(grid) and _still_fails(backend, candidate, check):
+                grid = candidate
+                improved = True
+                break
+    return grid
+
+
+def fuzz(boards=DEFAULT_BOARDS, sizes=DEFAULT_SIZES, backends=None, workers=1, seed=0):
+    """Check boards random boards against every backend.
+
+    Returns (boards checked, failures) where failures lists
+    (backend, grid, check, expected, got) tuples.
+    """
+    backends = list(backends or available_backends())
+    for backend in backends:
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    chunk_count = max(1, workers * CHUNKS_PER_WORKER)
+    base, extra = divmod(boards, chunk_count)
+    chunks = [(seed, i, base + (1 if i < extra else 0), tuple(sizes), backends)
+              for i in range(chunk_count) if base + (1 if i < extra else 0)]
+    checked = 0
+    failures = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for count, chunk_failures in pool.map(_fuzz_chunk, *zip(*chunks)):
+                checked += count
+                failures += chunk_failures
+    else:
+        for chunk in chunks:
+            count, chunk_failures = _fuzz_chunk(*chunk)
+            checked += count
+            failures += chunk_failures
+    return checked, failures
+
+
+def smallest_counterexample(failures):
+    """Shrink every failure and return the smallest as (backend, grid, check, expected, got)"""
+    best = None
+    for backend, grid, check, _, _ in failures:
+        grid = shrink(backend, grid, check)
+        if best is None or _board_size(grid) < _board_size(best[1]):
+            best = (backend, grid, check)
+    if best is None:
+        return None
+    backend, grid, check = best
+    for _, failed_check, expected, got in _compare(backend, [grid]):
+        if failed_check == check:
+            return backend, grid, check, expected, got
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fuzz the move engines against a reference implementation")
+    parser.add_argument("--boards", type=int, default=DEFAULT_BOARDS)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), help="default: all available")
+    parser.add_argument("--workers", type=int, default=0, help="processes to use, 0 for one per core")
+    parser.add_argument("--seed", type=int, default=None, help="default: a random seed, printed")
+    args = parser.parse_args(argv)
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+    workers = args.workers or os.cpu_count() or 1
+    backends = args.backends or available_backends()
+    print(f"seed {seed}, {workers} worker(s), sizes {args.sizes}, backends {', '.join(backends)}")
+    start = time.perf_counter()
+    checked, failures = fuzz(args.boards, args.sizes, backends, workers, seed)
+    print(f"checked {checked} boards in {time.perf_counter() - start:.1f}s")
+    if not failures:
+        print("no mismatches")
+        return 0
+
+    by_backend = {}
+    for backend, *_ in failures:
+        by_backend[backend] = by_backend.get(backend, 0) + 1
+    print("mismatches: " + ", ".join(f"{name} {count}" for name, count in sorted(by_backend.items())))
+    backend, grid, check, expected, got = smallest_counterexample(failures)
+    check_name = check if check == LEGAL else bitboard.DIRECTION_NAMES[check]
+    print(f"smallest counterexample ({backend}, {check_name}):")
+    for row in grid:
+        print("  " + " ".join(f"{value:>5}" for value in row))
+    print(f"  expected {expected}")
+    print(f"  got      {got}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
 import pygame
 import sqlite3
+from bitboard import created_values
 from utils import DB_FILE
+from fonts import get_font
+from renderer import Renderer
+from pacing import FramePacer
 
 # Adventure level definitions
 adventure_levels = [
@@ -31,24 +35,21 @@ swift_levels = [
 
 # Global dictionary to track target achievements
 current_session_targets = {}
-current_level_number = None
 
-def set_current_level(level_number):
-    """Set the current level for merge tracking"""
-    global current_level_number
-    current_level_number = level_number
+def record_created_tiles(level_number, created):
+    """Count the tiles one move created towards the level's targets.
 
-def on_tile_merged(tile_value):
-    """Called whenever tiles are merged - tracks tile creation"""
-    global current_session_targets, current_level_number
-    
-    if current_level_number is None or current_level_number not in current_session_targets:
+    created is the record returned by the move functions in move.py.
+    """
+    targets = current_session_targets.get(level_number)
+    if not targets or not created:
         return
     
-    # Track this tile creation
-    if tile_value in current_session_targets[current_level_number]:
-        target_info = current_session_targets[current_level_number][tile_value]
-        target_info["created_count"] += 1
+    for tile_value, count in created_values(created):
+        target_info = targets.get(tile_value)
+        if target_info is None:
+            continue
+        target_info["created_count"] += count
         
         # Update achieved count
         target_info["achieved"] = target_info["created_count"]
@@ -56,8 +57,6 @@ def on_tile_merged(tile_value):
         # Mark as completed if we've achieved the required count
         if target_info["achieved"] >= target_info["required"]:
             target_info["completed"] = True
-        
-        print(f"Created tile {tile_value}! Total created: {target_info['created_count']}/{target_info['required']}")
 
 def get_unlocked_level(mode):
     """Gets the highest unlocked level for a specific game mode."""
@@ -116,11 +115,6 @@ def initialize_level_targets(level_number, level_data):
             "completed": False,
             "created_count": 0  # Track how many times this tile was created
         }
-    
-    # Set up merge tracking
-    set_current_level(level_number)
-    from move import set_merge_callback
-    set_merge_callback(on_tile_merged)
 
 def check_adventure_win(level_number, level_data, grid):
     """Check if all target tiles have been achieved in this session"""
@@ -143,15 +137,19 @@ def check_swift_win(level, score, elapsed_time):
         return "win"
     return None
 
-def draw_adventure_info_board(screen, font, level_number, level_data, grid, moves_used):
-    """Draw information board for adventure mode - with separate boxes side by side"""
+def info_board_rect(screen):
+    """Area covered by the adventure and swift info boards, check marks included"""
+    return pygame.Rect(screen.get_width() - 360, 35, 360, 150)
+
+def draw_adventure_info_frame(screen, font, level_number, level_data):
+    """Draw the parts of the adventure info boards that stay the same for a level"""
     screen_width = screen.get_width()
     
     # Position info boards on the right side
     info_start_x = screen_width - 350  # Start further left to accommodate two boxes
     info_y = 50  # Start from top
     
-    small_font = pygame.font.Font(None, 32)
+    small_font = get_font(32)
     
     # Box 1: Level and Moves Info (Left box)
     box1_width = 150
@@ -164,12 +162,6 @@ def draw_adventure_info_board(screen, font, level_number, level_data, grid, move
     level_text = font.render(f"Level {level_number}", True, (0, 0, 0))
     screen.blit(level_text, (box1_x, info_y))
     
-    # Draw moves info
-    moves_remaining = level_data["max_moves"] - moves_used
-    moves_color = (255, 0, 0) if moves_remaining <= 5 else (0, 0, 0)
-    moves_text = small_font.render(f"Moves: {moves_used}/{level_data['max_moves']}", True, moves_color)
-    screen.blit(moves_text, (box1_x, info_y + 40))
-    
     # Box 2: Targets Progress (Right box)
     box2_x = box1_x + box1_width + 20  # Position to the right of box1 with 20px gap
     num_targets = len(level_data["targets"])
@@ -181,6 +173,26 @@ def draw_adventure_info_board(screen, font, level_number, level_data, grid, move
     # Draw targets header
     targets_header = small_font.render("Targets:", True, (0, 0, 0))
     screen.blit(targets_header, (box2_x, info_y))
+
+def draw_adventure_info_values(screen, font, level_number, level_data, moves_used):
+    """Draw the moves used and target progress over draw_adventure_info_frame"""
+    screen_width = screen.get_width()
+    
+    info_start_x = screen_width - 350
+    info_y = 50
+    
+    small_font = get_font(32)
+    
+    box1_width = 150
+    box1_x = info_start_x
+    
+    # Draw moves info
+    moves_remaining = level_data["max_moves"] - moves_used
+    moves_color = (255, 0, 0) if moves_remaining <= 5 else (0, 0, 0)
+    moves_text = small_font.render(f"Moves: {moves_used}/{level_data['max_moves']}", True, moves_color)
+    screen.blit(moves_text, (box1_x, info_y + 40))
+    
+    box2_x = box1_x + box1_width + 20
     target_y = info_y + 35
     
     # Draw target progress
@@ -209,18 +221,20 @@ def draw_adventure_info_board(screen, font, level_number, level_data, grid, move
             
             target_y += 35
 
-def draw_swift_info_boards(screen, font, level_number, level_data, score, elapsed_time):
-    """Draw information boards for swift mode - with separate boxes side by side"""
+def draw_adventure_info_board(screen, font, level_number, level_data, grid, moves_used):
+    """Draw information board for adventure mode - with separate boxes side by side"""
+    draw_adventure_info_frame(screen, font, level_number, level_data)
+    draw_adventure_info_values(screen, font, level_number, level_data, moves_used)
+
+def draw_swift_info_frame(screen, font, level_number, level_data):
+    """Draw the parts of the swift info boards that stay the same for a level"""
     screen_width = screen.get_width()
     
     # Position info boards on the right side
     info_start_x = screen_width - 350  # Start further left to accommodate two boxes
     info_y = 50  # Start from top
     
-    small_font = pygame.font.Font(None, 30)
-    
-    # Calculate time remaining
-    time_remaining = max(0, level_data["time_limit"] - elapsed_time)
+    small_font = get_font(30)
     
     # Box 1: Level Info (Left box)
     box1_width = 150
@@ -233,13 +247,6 @@ def draw_swift_info_boards(screen, font, level_number, level_data, score, elapse
     level_text = font.render(f"Level {level_number}", True, (0, 0, 0))
     screen.blit(level_text, (box1_x, info_y))
     
-    # Draw time remaining
-    minutes = int(time_remaining // 60)
-    seconds = int(time_remaining % 60)
-    time_color = (255, 0, 0) if time_remaining <= 30 else (0, 0, 0)
-    time_text = small_font.render(f"Time: {minutes:02d}:{seconds:02d}", True, time_color)
-    screen.blit(time_text, (box1_x, info_y + 35))
-    
     # Box 2: Score Progress (Right box)
     box2_x = box1_x + box1_width + 20  # Position to the right of box1 with 20px gap
     box2_width = 150
@@ -250,6 +257,30 @@ def draw_swift_info_boards(screen, font, level_number, level_data, score, elapse
     # Draw target score
     target_text = small_font.render(f"Target: {level_data['target_score']}", True, (0, 0, 0))
     screen.blit(target_text, (box2_x, info_y))
+
+def draw_swift_info_values(screen, font, level_data, score, elapsed_time):
+    """Draw the time left and score over draw_swift_info_frame"""
+    screen_width = screen.get_width()
+    
+    info_start_x = screen_width - 350
+    info_y = 50
+    
+    small_font = get_font(30)
+    
+    # Calculate time remaining
+    time_remaining = max(0, level_data["time_limit"] - elapsed_time)
+    
+    box1_width = 150
+    box1_x = info_start_x
+    
+    # Draw time remaining
+    minutes = int(time_remaining // 60)
+    seconds = int(time_remaining % 60)
+    time_color = (255, 0, 0) if time_remaining <= 30 else (0, 0, 0)
+    time_text = small_font.render(f"Time: {minutes:02d}:{seconds:02d}", True, time_color)
+    screen.blit(time_text, (box1_x, info_y + 35))
+    
+    box2_x = box1_x + box1_width + 20
     
     # Draw current score
     score_color = (0, 150, 0) if score >= level_data["target_score"] else (0, 0, 0)
@@ -260,12 +291,17 @@ def draw_swift_info_boards(screen, font, level_number, level_data, score, elapse
         check_text = font.render("✓", True, (0, 200, 0))
         screen.blit(check_text, (box2_x + 100, info_y + 30))
 
+def draw_swift_info_boards(screen, font, level_number, level_data, score, elapsed_time):
+    """Draw information boards for swift mode - with separate boxes side by side"""
+    draw_swift_info_frame(screen, font, level_number, level_data)
+    draw_swift_info_values(screen, font, level_data, score, elapsed_time)
+
 def level_selection_loop(screen, mode):
     """Display a level selection screen for the given mode."""
     from button import Button
     
-    clock = pygame.time.Clock()
-    font = pygame.font.Font(None, 50)
+    pacer = FramePacer()
+    font = get_font(50)
     
     levels = adventure_levels if mode == "adventure" else swift_levels
     unlocked_levels = get_unlocked_level(mode)
@@ -278,13 +314,23 @@ def level_selection_loop(screen, mode):
     
     back_btn = Button(None, (100, 600), "Back", font, "Black", "LightGray")
     
-    while True:
+    def draw_frame(screen):
         screen.fill((230, 230, 230))
         
         title = font.render(f"Select {mode.title()} Level", True, (0, 0, 0))
         screen.blit(title, (screen.get_width() // 2 - title.get_width() // 2, 100))
         
-        for event in pygame.event.get():
+        for btn in buttons:
+            btn.update(screen)
+        back_btn.update(screen)
+    
+    # Nothing on this screen changes, so only the first frame is drawn
+    renderer = Renderer(screen)
+    
+    while True:
+        renderer.present(draw_frame)
+        
+        for event in pacer.events():
             if event.type == pygame.QUIT:
                 return None
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -294,13 +340,6 @@ def level_selection_loop(screen, mode):
                         return idx + 1
                 if back_btn.checkforinput(pos):
                     return None
-        
-        for btn in buttons:
-            btn.update(screen)
-        back_btn.update(screen)
-        
-        pygame.display.flip()
-        clock.tick(60)
 
 def show_level_complete_message(screen, font, mode, level, score=None, time_or_moves=None, is_replay=False):
     """Shows a message when a level is completed."""
@@ -309,11 +348,11 @@ def show_level_complete_message(screen, font, mode, level, score=None, time_or_m
     overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
     overlay.fill((0, 0, 0, 180))
     
-    font_big = pygame.font.Font(None, 80)
+    font_big = get_font(80)
     text1 = font_big.render("Level Complete!", True, (255, 215, 0))
     text1_rect = text1.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 - 80))
     
-    button_font = pygame.font.Font(None, 36)
+    button_font = get_font(36)
     
     if is_final_level(mode, level):
         retry_btn = Button(None, (screen.get_width() // 2 - 100, screen.get_height() // 2 + 60), 
@@ -332,12 +371,12 @@ def show_level_complete_message(screen, font, mode, level, score=None, time_or_m
         buttons = [next_btn, retry_btn, home_btn]
         button_actions = ["next_level", "retry", "home"]
     
-    clock = pygame.time.Clock()
+    pacer = FramePacer()
     while True:
         screen.blit(overlay, (0, 0))
         screen.blit(text1, text1_rect)
         
-        for event in pygame.event.get():
+        for event in pacer.events("popup"):
             if event.type == pygame.QUIT:
                 return "home"
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -350,7 +389,6 @@ def show_level_complete_message(screen, font, mode, level, score=None, time_or_m
             btn.update(screen)
         
         pygame.display.flip()
-        clock.tick(60)
 
 def show_game_over_message(screen, font, mode, level, reason="Game Over!"):
     """Shows a message when the game is over."""
@@ -359,8 +397,8 @@ def show_game_over_message(screen, font, mode, level, reason="Game Over!"):
     overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
     overlay.fill((0, 0, 0, 180))
     
-    font_big = pygame.font.Font(None, 80)
-    font_small = pygame.font.Font(None, 40)
+    font_big = get_font(80)
+    font_small = get_font(40)
     
     text1 = font_big.render("Game Over!", True, (255, 100, 100))
     text1_rect = text1.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 - 100))
@@ -368,7 +406,7 @@ def show_game_over_message(screen, font, mode, level, reason="Game Over!"):
     text2 = font_small.render(reason, True, (255, 255, 255))
     text2_rect = text2.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 - 50))
     
-    button_font = pygame.font.Font(None, 36)
+    button_font = get_font(36)
     
     retry_btn = Button(None, (screen.get_width() // 2 - 120, screen.get_height() // 2 + 60), 
                       "Retry", button_font, "Black", "LightBlue")
@@ -378,13 +416,13 @@ def show_game_over_message(screen, font, mode, level, reason="Game Over!"):
     buttons = [retry_btn, home_btn]
     button_actions = ["retry", "home"]
     
-    clock = pygame.time.Clock()
+    pacer = FramePacer()
     while True:
         screen.blit(overlay, (0, 0))
         screen.blit(text1, text1_rect)
         screen.blit(text2, text2_rect)
         
-        for event in pygame.event.get():
+        for event in pacer.events("popup"):
             if event.type == pygame.QUIT:
                 return "home"
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -397,7 +435,6 @@ def show_game_over_message(screen, font, mode, level, reason="Game Over!"):
             btn.update(screen)
         
         pygame.display.flip()
-        clock.tick(60)
 
 def display_adventure_targets(screen, font, level_number, level_data, grid):
     """Display target progress with visual indicators (alias for draw_adventure_info_board)"""
@@ -9,6 +9,9 @@ import classic
 import random
 import math
 from level_systems import adventure_levels, level_selection_loop, unlock_next_level
+from fonts import get_font
+from renderer import Renderer
+from pacing import FramePacer, report_usage
 
 SCREEN_SIZE = (700, 700)
 BG_COLOR = (245, 240, 230)  # Light beige background
@@ -17,7 +20,7 @@ pygame.init()
 pygame.mixer.init()
 screen = pygame.display.set_mode(SCREEN_SIZE)
 pygame.display.set_caption("2048")
-clock = pygame.time.Clock()
+pacer = FramePacer()
 
 # Initialize database
 init_db()
@@ -67,9 +70,9 @@ FONT_SIZE_BUTTON = 30
 FONT_SIZE_ICON = 30
 
 # Fonts
-title_font = pygame.font.Font(None, FONT_SIZE_TITLE)
-button_font = pygame.font.Font(None, FONT_SIZE_BUTTON)
-icon_font = pygame.font.Font(None, FONT_SIZE_ICON)
+title_font = get_font(FONT_SIZE_TITLE)
+button_font = get_font(FONT_SIZE_BUTTON)
+icon_font = get_font(FONT_SIZE_ICON)
 
 # Colors
 ORANGE = (255, 165, 0)
@@ -226,9 +229,10 @@ def play_move_sound():
     if sound_on and move_sound:
         move_sound.play()
 
-# Main game loop
-running = True
-while running:
+def draw_menu(screen):
+    """Draw the whole menu; the header and icon rects are kept for clicks"""
+    global close_rect, music_rect, sound_rect, settings_rect
+
     # Draw background (image or solid color)
     draw_background()
 
@@ -241,7 +245,22 @@ while running:
     # Draw main title
     draw_title()
 
-    for event in pygame.event.get():
+    # Draw buttons
+    classic_btn.update(screen)
+    adventure_btn.update(screen)
+    swift_btn.update(screen)
+
+# Only the music and sound icons change on the menu itself; coming back
+# from a mode repaints everything
+renderer = Renderer(screen)
+
+# Main game loop
+running = True
+while running:
+    renderer.track("icons", (SCREEN_SIZE[0] - 150, 60, 110, 30), (music_on, sound_on))
+    renderer.present(draw_menu)
+
+    for event in pacer.events():
         if event.type == pygame.QUIT:
             running = False
 
@@ -269,27 +288,25 @@ while running:
             # Check game mode buttons
             elif classic_btn.checkforinput(mouse_pos):
                 classic.run_classic_mode(screen, button_font)
+                renderer.invalidate()
                 if not pygame.display.get_init():
                     running = False
                     break
             elif adventure_btn.checkforinput(mouse_pos):
                 adventure.run_adventure_mode(screen, button_font)
+                renderer.invalidate()
                 if not pygame.display.get_init():
                     running = False
                     break
             elif swift_btn.checkforinput(mouse_pos):
                 swift_mode.run_swift_mode(screen, button_font)
+                renderer.invalidate()
                 if not pygame.display.get_init():
                     running = False
                     break
 
-    # Update and draw buttons
-    classic_btn.update(screen)
-    adventure_btn.update(screen)
-    swift_btn.update(screen)
-
-    pygame.display.flip()
-    clock.tick(60)
+# Where the CPU time went: idle menus and boards should barely register
+report_usage()
 
 pygame.quit()
 sys.exit()
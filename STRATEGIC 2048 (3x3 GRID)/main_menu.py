@@ -4,25 +4,40 @@ import adventure
 import swift_mode as swift
 import classic  # import your classic mode module
 from button import Button
+from fonts import get_font
+from renderer import Renderer
+from pacing import FramePacer
 
 pygame.init()
 screen = pygame.display.set_mode((700, 700))
 pygame.display.set_caption("")
 
-font = pygame.font.Font(None, 70)
+font = get_font(70)
 title_text = font.render("2048", True, (50, 50, 50))
 
-button_font = pygame.font.Font(None, 40)
+button_font = get_font(40)
 classic_btn = Button(None, (350, 300), "Classic Mode", button_font, "Black", "SkyBlue")
 adventure_btn = Button(None, (350, 400), "Adventure Mode", button_font, "Black", "Orange")
 swift_btn = Button(None, (350, 500), "Swift Mode", button_font, "Black", "Tomato")
 
-running = True
-while running:
+def draw_menu(screen):
     screen.fill((255, 255, 204))
     screen.blit(title_text, (screen.get_width() // 2 - title_text.get_width() // 2, 100))
 
-    for event in pygame.event.get():
+    classic_btn.update(screen)
+    adventure_btn.update(screen)
+    swift_btn.update(screen)
+
+# Nothing on this menu changes by itself: it is drawn once, redrawn after
+# a mode returns, and the loop sleeps until the next event
+pacer = FramePacer()
+renderer = Renderer(screen)
+
+running = True
+while running:
+    renderer.present(draw_menu)
+
+    for event in pacer.events():
         if event.type == pygame.QUIT:
             running = False
         elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -33,13 +48,12 @@ while running:
                 adventure.run_adventure_mode(screen, button_font)
             elif swift_btn.checkforinput(mouse_pos):
                 swift.run_swift_mode(screen, button_font)
-
-    classic_btn.update(screen)
-    adventure_btn.update(screen)
-    swift_btn.update(screen)
-
-    pygame.display.flip()
-    pygame.time.Clock().tick(60)
+            else:
+                continue
+            renderer.invalidate()  # the mode drew over the whole screen
+            if not pygame.display.get_init():
+                running = False
+                break
 
 pygame.quit()
 sys.exit()
@@ -0,0 +1,113 @@
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+from policies import POLICIES, check_policy, play_out
+
+# Monte Carlo move advisor: for each legal direction, make the move and
+# play many games to the end with a fast policy, then compare the mean
+# final score. Rollouts are split into chunks and run in a process pool.
+
+DEFAULT_ROLLOUTS = 1000
+
+
+def _rollout_chunk(board, direction, count, policy_name, seed):
+    """Run count rollouts after direction; returns (direction, n, sum, sum of squares)"""
+    rng = random.Random(seed)
+    policy = POLICIES[policy_name]
+    after, _, gained, _ = bitboard.move(board, direction)
+    total = 0
+    total_squares = 0
+    for _ in range(count):
+        score, _, _ = play_out(bitboard.add_new_tile(after, rng), policy, rng)
+        score += gained
+        total += score
+        total_squares += score * score
+    return direction, count, total, total_squares
+
+
+def advise(grid, rollouts=DEFAULT_ROLLOUTS, policy="random", workers=None, seed=None, score=0):
+    """Estimate the final score of each legal move from grid.
+
+    grid is a list-of-lists grid or a packed board. Each legal direction
+    gets rollouts games played with the named policy (see policies.POLICIES),
+    spread over workers processes (default: one per core).
+
+    Returns {direction: (mean, variance)} of the final score, where score
+    is the score already banked before this move.
+    """
+    check_policy(policy)
+    if rollouts < 1:
+        raise ValueError(f"rollouts must be at least 1, got {rollouts}")
+    if workers is not None and workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    board = grid if isinstance(grid, int) else bitboard.pack(grid)
+    workers = workers or os.cpu_count() or 1
+    directions = bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]
+    if not directions:
+        return {}
+
+    # One chunk per worker and direction keeps every process busy until the
+    # end; chunk seeds come from one generator, so a seed and worker count
+    # fix the result.
+    seeds = random.Random(seed)
+    chunks = []
+    for direction in directions:
+        base, extra = divmod(rollouts, workers)
+        for i in range(workers):
+            count = base + (1 if i < extra else 0)
+            if count:
+                chunks.append((board, direction, count, policy, seeds.getrandbits(64)))
+
+    totals = {direction: [0, 0, 0] for direction in directions}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_rollout_chunk, *chunk) for chunk in chunks]
+        for future in futures:
+            direction, count, total, total_squares = future.result()
+            totals[direction][0] += count
+            totals[direction][1] += total
+            totals[direction][2] += total_squares
+
+    results = {}
+    for direction, (count, total, total_squares) in totals.items():
+        mean = total / count
+        results[direction] = (score + mean, total_squares / count - mean * mean)
+    return results
+
+
+def best_direction(results):
+    """Direction with the highest mean in an advise() result, or None"""
+    return max(results, key=lambda direction: results[direction][0]) if results else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo move advisor for a 3x3 board")
+    parser.add_argument("cells", help="nine comma separated tile values, row by row, e.g. 2,0,0,0,4,0,0,0,2")
+    parser.add_argument("--rollouts", type=int, default=DEFAULT_ROLLOUTS)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    if args.rollouts < 1:
+        parser.error("--rollouts must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    try:
+        check_policy(args.policy)
+    except ValueError as e:
+        parser.error(str(e))
+
+    values = [int(value) for value in args.cells.split(",")]
+    if len(values) != bitboard.SIZE * bitboard.SIZE:
+        parser.error(f"expected {bitboard.SIZE * bitboard.SIZE} cells")
+    grid = [values[r * bitboard.SIZE:(r + 1) * bitboard.SIZE] for r in range(bitboard.SIZE)]
+
+    results = advise(grid, args.rollouts, args.policy, args.workers, args.seed)
+    for direction, (mean, variance) in sorted(results.items(), key=lambda item: -item[1][0]):
+        print(f"{bitboard.DIRECTION_NAMES[direction]:>5}: mean {mean:.1f}, std {variance ** 0.5:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,226 @@
+import os
 import random
-merge_callback = None
+import bitboard
 
-def set_merge_callback(callback):
-    """Set a callback function to be called when tiles are merged"""
-    global merge_callback
-    merge_callback = callback
+# Every move returns (grid, moved, score, created). created records the
+# tiles the move made by merging, as counts packed 4 bits per exponent
+# (see bitboard.created_count and bitboard.created_values), so callers can
+# update their targets and stats once per move.
+
+class GameRandom(random.Random):
+    """Random generator owned by one game.
+
+    It remembers the seed it was created with, so a game can be replayed
+    from (seed, move sequence) with replay().
+    """
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().randrange(1 << 32)
+        self.seed_value = seed
+        super().__init__(seed)
+
+# Set SHOW_SEEDS=1 in the environment to print the seed of every game the
+# modes start, e.g. to replay a game that went wrong with replay().
+SHOW_SEEDS = os.environ.get("SHOW_SEEDS", "") not in ("", "0")
+
+def report_seed(mode, game):
+    """Print the seed of a new game (a Board) when SHOW_SEEDS is set"""
+    if SHOW_SEEDS:
+        print(f"{mode} game seed: {game.seed}")
+
+# The engine for the 3x3 boards every mode plays, resolved once. Board binds
+# its own engine when it is created; the list functions below use this one
+# and only look up the engine for other sizes.
+_ENGINE = bitboard.engine_for(bitboard.SIZE)
 
 def initialize_grid(size=4):
     return [[0 for _ in range(size)] for _ in range(size)]
-def add_new_tile(grid):
+
+def new_game(size=3, seed=None):
+    """Start a game with two tiles; returns (grid, rng) where rng must be
+    passed to every later add_new_tile of this game"""
+    rng = GameRandom(seed)
+    grid = initialize_grid(size)
+    return add_new_tile(add_new_tile(grid, rng), rng), rng
+
+# Merges into the largest tile a packed cell holds are counted in the top
+# field of a created record
+_CAPPED_SHIFT = bitboard.CELL_BITS * bitboard.MAX_EXPONENT
+_CAPPED_TILE = bitboard.exponent_to_value(bitboard.MAX_EXPONENT)
+
+class Board:
+    """A game in progress, kept as a packed board.
+
+    Besides the board it tracks the score, the highest exponent and the
+    mask and count of empty cells, updated by every move and spawn, so
+    reading them costs nothing. Spawns draw from the game's own GameRandom
+    in the same order as add_new_tile, so Board(size, seed) and
+    new_game(size, seed) play out the same game.
+
+    Packed cells stop at 32768 (bitboard.MAX_EXPONENT) and two 32768 tiles
+    cannot merge, so a move that would make a second one raises
+    OverflowError instead of playing on with wrong moves. Only 4x4 and 5x5
+    games can get that far.
+    """
+
+    def __init__(self, size=3, seed=None):
+        self.size = size
+        self.engine = bitboard.engine_for(size)
+        self.rng = GameRandom(seed)
+        self.board = 0
+        self.score = 0
+        self.max_exponent = 0
+        self.empty_mask = (1 << (size * size)) - 1
+        self.empty_count = size * size
+        self._grid = None
+        self.spawn()
+        self.spawn()
+
+    @property
+    def seed(self):
+        return self.rng.seed_value
+
+    @property
+    def grid(self):
+        """The board as a list-of-lists grid, unpacked once per change"""
+        if self._grid is None:
+            self._grid = self.engine.unpack(self.board)
+        return self._grid
+
+    @property
+    def max_tile(self):
+        return bitboard.exponent_to_value(self.max_exponent)
+
+    def spawn(self):
+        """Place a 2 or a 4 on a random empty cell; False when the board is full"""
+        cells = self.engine.empty_cell_shifts[self.empty_mask]
+        if not cells:
+            return False
+        shift = self.rng.choice(cells)
+        exponent = 1 if self.rng.random() < 0.9 else 2
+        self.board |= exponent << shift
+        self.empty_mask &= ~(1 << (shift // bitboard.CELL_BITS))
+        self.empty_count -= 1
+        if exponent > self.max_exponent:
+            self.max_exponent = exponent
+        self._grid = None
+        return True
+
+    def move(self, direction):
+        """Play one turn: slide in direction and, if anything moved, spawn.
+
+        Returns (moved, gained, created) with created as returned by the
+        move functions.
+        """
+        board, moved, gained, created = self.engine.moves[direction](self.board)
+        if not moved:
+            return False, 0, 0
+        capped = created >> _CAPPED_SHIFT
+        if capped and (capped > 1 or self.max_exponent == bitboard.MAX_EXPONENT):
+            raise OverflowError(f"a {self.size}x{self.size} board cannot hold two {_CAPPED_TILE} tiles")
+        self.board = board
+        self.score += gained
+        if created:
+            # Every merge frees one cell, and the largest new tile is the
+            # only candidate for a new maximum
+            self.empty_count += bitboard.created_total(created)
+            self.max_exponent = max(self.max_exponent, bitboard.created_max_exponent(created))
+        # Sliding moves the empty cells around, so the mask is rebuilt from
+        # the row tables
+        self.empty_mask = self.engine.empty_mask(board)
+        self._grid = None
+        self.spawn()
+        return True, gained, created
+
+    def legal_moves(self):
+        """Mask of legal directions, bit 1 << d for d in bitboard.DIRECTIONS"""
+        return self.engine.legal_moves(self.board)
+
+    def save(self):
+        """Snapshot for undo; pass it back to restore()"""
+        return (self.board, self.score, self.max_exponent, self.empty_mask, self.empty_count,
+                self.rng.getstate())
+
+    def restore(self, state):
+        (self.board, self.score, self.max_exponent, self.empty_mask, self.empty_count,
+         rng_state) = state
+        self.rng.setstate(rng_state)
+        self._grid = None
+
+def add_new_tile(grid, rng=random, empty_mask=None):
+    """Place a 2 or a 4 on a random empty cell, drawing from rng.
+
+    A caller that keeps the mask of empty cells (bit i set when cell i is
+    empty, as Board.empty_mask) can pass it as empty_mask, and the cells are
+    looked up in the engine's table instead of scanning the grid. Either
+    way the cells are listed in the same order, so the draws match Board.
+    """
     size = len(grid)
-    empty_cells = [(i, j) for i in range(size) for j in range(size) if grid[i][j] == 0]
+    if empty_mask is None:
+        empty_cells = []
+        i = 0
+        for row in grid:
+            for value in row:
+                if not value:
+                    empty_cells.append(i)
+                i += 1
+    else:
+        engine = _ENGINE if size == bitboard.SIZE else bitboard.engine_for(size)
+        empty_cells = [shift // bitboard.CELL_BITS for shift in engine.empty_cell_shifts[empty_mask]]
     if not empty_cells:
         return grid
-    i, j = random.choice(empty_cells)
-    grid[i][j] = 2 if random.random() < 0.9 else 4
+    i, j = divmod(rng.choice(empty_cells), size)
+    grid[i][j] = 2 if rng.random() < 0.9 else 4
     return grid
 def merge_row_left(row):
-    """Merge a row to the left and track merges"""
-    global merge_callback
-    new_row = [num for num in row if num != 0]
-    score = 0
-    i = 0
-    while i < len(new_row) - 1:
-        if new_row[i] == new_row[i + 1]:
-            merged_value = new_row[i] * 2
-            new_row[i] = merged_value
-            score += merged_value
-            
-            # Call the callback to track the merge
-            if merge_callback:
-                merge_callback(merged_value)
-            
-            new_row.pop(i + 1)
-        i += 1
-    new_row += [0] * (len(row) - len(new_row))
-    return new_row, score
+    """Merge a row to the left; returns (new_row, score, created)"""
+    engine = _ENGINE if len(row) == bitboard.SIZE else bitboard.engine_for(len(row))
+    key, score, created = engine.merge_row(bitboard.pack_row(row))
+    return list(engine.row_values[key]), score, created
+
+def _packed_move(direction, grid):
+    """Run a move on the packed engine for the grid's size and convert back"""
+    engine = _ENGINE if len(grid) == bitboard.SIZE else bitboard.engine_for(len(grid))
+    board, moved, score, created = engine.moves[direction](engine.pack(grid))
+    return engine.unpack(board), moved, score, created
 
 def move_left(grid):
-    new_grid = []
-    total_score = 0
-    moved = False
-    for row in grid:
-        original_row = row[:]
-        new_row, score = merge_row_left(row)
-        if new_row != original_row:
-            moved = True
-        new_grid.append(new_row)
-        total_score += score
-    return new_grid, moved, total_score
+    return _packed_move(bitboard.LEFT, grid)
 
 def move_right(grid):
-    new_grid = []
-    total_score = 0
-    moved = False
-    for row, original_row in zip(grid, grid):
-        reversed_row = row[::-1]
-        new_row, score = merge_row_left(reversed_row)
-        new_row = new_row[::-1]
-        if new_row != original_row:
-            moved = True
-        new_grid.append(new_row)
-        total_score += score
-    return new_grid, moved, total_score
+    return _packed_move(bitboard.RIGHT, grid)
 
 def transpose(grid):
     return [list(row) for row in zip(*grid)]
 
 def move_up(grid):
-    transposed = transpose(grid)
-    moved_grid, moved, score = move_left(transposed)
-    return transpose(moved_grid), moved, score
+    return _packed_move(bitboard.UP, grid)
 
 def move_down(grid):
-    transposed = transpose(grid)
-    moved_grid, moved, score = move_right(transposed)
-    return transpose(moved_grid), moved, score
+    return _packed_move(bitboard.DOWN, grid)
+
+def canonical(grid):
+    """Canonical packed key of a 3x3 grid and its symmetry.
+
+    Returns (key, s): the eight rotations/reflections of a grid share one
+    key, and a direction chosen for the key's board maps back to grid with
+    map_direction(direction, s).
+    """
+    return bitboard.canonical_symmetry(bitboard.pack(grid))
+
+def map_direction(direction, symmetry):
+    """Direction on the original grid for a direction on its canonical board"""
+    return bitboard.map_direction(direction, symmetry)
+
+def legal_moves(grid):
+    """Mask of legal directions, bit 1 << d for d in bitboard.DIRECTIONS"""
+    engine = _ENGINE if len(grid) == bitboard.SIZE else bitboard.engine_for(len(grid))
+    return engine.legal_moves(engine.pack(grid))
 
 def can_move(grid):
+    # Plain list scan: packing a full grid for legal_moves costs more than
+    # comparing its neighbours directly
     for row in grid:
         if 0 in row:
             return True
@@ -92,15 +235,17 @@ def can_move(grid):
     return False
 
 def game_over(grid):
-    for row in grid:
-        if 0 in row:
-            return False
-    size = len(grid)
-    for r in range(size):
-        for c in range(size):
-            if c + 1 < size and grid[r][c] == grid[r][c + 1]:
-                return False
-            if r + 1 < size and grid[r][c] == grid[r + 1][c]:
-                return False
-
-    return True
+    return not can_move(grid)
+
+MOVES = (move_left, move_right, move_up, move_down)
+
+def replay(seed, directions, size=3):
+    """Rebuild a game from its seed and the directions played.
+
+    Directions that did not move the board are skipped, as in the game.
+    Returns (grid, score).
+    """
+    game = Board(size, seed)
+    for direction in directions:
+        game.move(direction)
+    return game.grid, game.score
@@ -0,0 +1,122 @@
+import json
+from collections import OrderedDict
+
+import bitboard
+
+# Optional memoization in front of the packed move functions. Results are
+# kept per (packed board, direction) in an OrderedDict used as an LRU list:
+# a hit moves the entry to the end, and once the cache holds max_size
+# entries the least recently used one is dropped. The most recently used
+# keys can be saved at the end of a session and preloaded into the next.
+#
+# Nothing uses the cache by default: it only pays for itself on the larger
+# boards. A hit costs about 0.3-0.5 us at any size, but a miss costs the
+# move plus about 1 us of bookkeeping. Against the unrolled kernels, the
+# hit rate it needs to break even is about 85% on 3x3, 70% on 4x4 and
+# 40% on 5x5, whose moves work on 100-bit boards through lazily filled
+# tables. The 3x3 expectimax only sees 20-35% hits, because its
+# transposition table already folds repeated positions, and it got about
+# 40% slower with a cache. Use it for 5x5 (or 4x4) bots and analysis that
+# replay the same positions, and measure the hit rate with stats().
+
+DEFAULT_MAX_SIZE = 100000
+
+
+class MoveCache:
+    """LRU cache of move results for one engine, meant for 4x4 and 5x5.
+
+    engine defaults to the 3x3 one, where the cache rarely pays off.
+
+    cache.moves can stand in for bitboard.MOVES or engine.moves: every
+    function takes a packed board and returns (board, moved, score,
+    created).
+    """
+
+    def __init__(self, engine=None, max_size=DEFAULT_MAX_SIZE):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.engine = engine or bitboard.engine_for(bitboard.SIZE)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self.moves = (self.move_left, self.move_right, self.move_up, self.move_down)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def move(self, board, direction):
+        key = (board, direction)
+        entries = self._entries
+        result = entries.get(key)
+        if result is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = entries[key] = self.engine.moves[direction](board)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def move_left(self, board):
+        return self.move(board, bitboard.LEFT)
+
+    def move_right(self, board):
+        return self.move(board, bitboard.RIGHT)
+
+    def move_up(self, board):
+        return self.move(board, bitboard.UP)
+
+    def move_down(self, board):
+        return self.move(board, bitboard.DOWN)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def hot_set(self, limit=None):
+        """(board, direction) keys, most recently used first"""
+        keys = list(reversed(self._entries))
+        return keys if limit is None else keys[:limit]
+
+    def save(self, path, limit=None):
+        """Write the hot set to a JSON file for preload()"""
+        with open(path, "w") as f:
+            json.dump({"size": self.engine.size, "keys": self.hot_set(limit)}, f)
+
+    def preload(self, path):
+        """Warm the cache with a hot set written by save().
+
+        The results are recomputed, so a file from an older engine cannot
+        put stale entries in the cache. Preloading does not count as hits
+        or misses. Returns the number of entries loaded.
+        """
+        with open(path) as f:
+            data = json.load(f)
+        if data["size"] != self.engine.size:
+            raise ValueError(f"{path} holds {data['size']}x{data['size']} boards, "
+                             f"not {self.engine.size}x{self.engine.size}")
+        keys = data["keys"][:self.max_size]
+        entries = self._entries
+        # Oldest first, so the most recently used key ends up at the end again
+        for board, direction in reversed(keys):
+            key = (board, direction)
+            entries[key] = self.engine.moves[direction](board)
+            entries.move_to_end(key)
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+        return len(keys)
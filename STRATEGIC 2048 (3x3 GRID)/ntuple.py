@@ -0,0 +1,231 @@
+import argparse
+import os
+import random
+import struct
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+
+# N-tuple network for the 3x3 game, trained by TD(0) on afterstates.
+#
+# The value of a board is a sum of table weights, one per tuple: a tuple
+# is a fixed group of cells and the exponents in those cells index its
+# table. Four base tuples are used,
+#   edge row      cells 0 1 2          16 ** 3 weights
+#   middle row    cells 3 4 5          16 ** 3 weights
+#   corner square cells 0 1 3 4        16 ** 4 weights
+#   corner hook   cells 0 1 2 3        16 ** 4 weights
+# and each is read on all eight symmetric versions of the board, sharing
+# its weights, so one evaluation is 32 lookups. The symmetric boards come
+# from the precomputed tables in bitboard, which puts every tuple at fixed
+# bits of a transformed board.
+#
+# Training plays games greedily against the current weights (move value =
+# score gained + value of the afterstate) and moves the value of each
+# afterstate towards the reward and value of the next one. Workers each
+# play a share of the games on their own copy of the weights and send back
+# the change they made; after every round the master weights move by the
+# average of those changes (the same as averaging the workers' weights).
+# Summing them instead overshoots, since every worker pushes the same
+# shared weights in the same direction.
+#
+# Weight file layout (little endian): MAGIC, weight count (Q), then the
+# weights as float32.
+
+MAGIC = b"T2048NT1"
+HEADER = struct.Struct("<8sQ")
+DEFAULT_PATH = "ntuple_weights.bin"
+DEFAULT_ALPHA = 0.005  # learning rate per weight
+TUPLE_SIZES = (1 << 12, 1 << 12, 1 << 16, 1 << 16)
+_MIDDLE_ROW = TUPLE_SIZES[0]
+_CORNER_SQUARE = _MIDDLE_ROW + TUPLE_SIZES[1]
+_CORNER_HOOK = _CORNER_SQUARE + TUPLE_SIZES[2]
+WEIGHT_COUNT = sum(TUPLE_SIZES)
+
+_ROW_MASK = bitboard.ROW_MASK
+_SHIFT1 = bitboard.ROW_BITS
+_SHIFT2 = 2 * bitboard.ROW_BITS
+_SYMMETRY_ROWS = bitboard.SYMMETRY_ROWS
+
+
+def features(board):
+    """Indices into the weight array of every tuple on every symmetry"""
+    k0 = board & _ROW_MASK
+    k1 = (board >> _SHIFT1) & _ROW_MASK
+    k2 = board >> _SHIFT2
+    indices = []
+    for t0, t1, t2 in _SYMMETRY_ROWS:
+        b = t0[k0] | t1[k1] | t2[k2]
+        indices.append(b & 0xFFF)
+        indices.append(_MIDDLE_ROW + ((b >> 12) & 0xFFF))
+        indices.append(_CORNER_SQUARE + ((b & 0xFF) | ((b >> 4) & 0xFF00)))
+        indices.append(_CORNER_HOOK + (b & 0xFFFF))
+    return indices
+
+
+class NTupleNetwork:
+    """Value function over packed 3x3 boards"""
+
+    def __init__(self, weights=None):
+        if weights is None:
+            weights = array("f", bytes(4 * WEIGHT_COUNT))
+        if len(weights) != WEIGHT_COUNT:
+            raise ValueError(f"expected {WEIGHT_COUNT} weights, got {len(weights)}")
+        self.weights = weights
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size or header[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not an n-tuple weight file")
+            _, count = HEADER.unpack(header)
+            if count != WEIGHT_COUNT:
+                raise ValueError(f"expected {WEIGHT_COUNT} weights in {path}, got {count}")
+            weights = array("f")
+            try:
+                weights.fromfile(f, count)
+            except EOFError:
+                raise ValueError(f"{path} is truncated") from None
+        return cls(weights)
+
+    def save(self, path=DEFAULT_PATH):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(self.weights)))
+            self.weights.tofile(f)
+
+    def value(self, board):
+        weights = self.weights
+        return sum(weights[i] for i in features(board))
+
+    def choose(self, board):
+        """Greedy move: returns (direction, gained, afterstate, value) or None.
+
+        value is gained plus the network's value of the afterstate.
+        """
+        best = None
+        for direction in bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]:
+            after, _, gained, _ = bitboard.move(board, direction)
+            value = gained + self.value(after)
+            if best is None or value > best[3]:
+                best = (direction, gained, after, value)
+        return best
+
+    def best_move(self, board):
+        """Best direction for a packed board, or None when no move is legal"""
+        choice = self.choose(board)
+        return choice[0] if choice else None
+
+    def _update(self, indices, delta):
+        weights = self.weights
+        for i in indices:
+            weights[i] += delta
+
+    def learn_game(self, rng, alpha=DEFAULT_ALPHA):
+        """Play one game, learning after every move; returns the final score"""
+        board = bitboard.add_new_tile(bitboard.add_new_tile(0, rng), rng)
+        score = 0
+        previous = None  # features of the last afterstate
+        previous_value = 0.0
+        while True:
+            choice = self.choose(board)
+            if choice is None:
+                break
+            _, gained, after, value = choice
+            if previous is not None:
+                # TD(0): pull V(last afterstate) towards r + V(this afterstate)
+                self._update(previous, alpha * (value - previous_value))
+            previous = features(after)
+            previous_value = value - gained
+            score += gained
+            board = bitboard.add_new_tile(after, rng)
+        if previous is not None:
+            self._update(previous, alpha * -previous_value)  # nothing follows a lost board
+        return score
+
+
+def _train_games(weights, seed, first, count, alpha):
+    """Worker: learn from count games; returns (weight changes, scores)"""
+    network = NTupleNetwork(array("f", weights))
+    scores = [network.learn_game(random.Random(f"{seed}-{index}"), alpha)
+              for index in range(first, first + count)]
+    return array("f", (new - old for new, old in zip(network.weights, weights))), scores
+
+
+def train(network, rounds, games, workers=1, alpha=DEFAULT_ALPHA, seed=0, log=None):
+    """Train network in place for rounds rounds of games self-play games.
+
+    Every game seeds its own generator from (seed, game number).
+    """
+    game = 0
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for round_number in range(rounds):
+            start = time.perf_counter()
+            if pool is None:
+                scores = [network.learn_game(random.Random(f"{seed}-{index}"), alpha)
+                          for index in range(game, game + games)]
+            else:
+                chunks = []
+                first = game
+                base, extra = divmod(games, workers)
+                for i in range(workers):
+                    count = base + (1 if i < extra else 0)
+                    if count:
+                        chunks.append((network.weights, seed, first, count, alpha))
+                        first += count
+                scores = []
+                weights = network.weights
+                share = 1.0 / len(chunks)
+                for changes, chunk_scores in pool.map(_train_games, *zip(*chunks)):
+                    for i, change in enumerate(changes):
+                        if change:
+                            weights[i] += share * change
+                    scores.extend(chunk_scores)
+            game += games
+            if log:
+                log(f"round {round_number + 1}/{rounds}: {game} games, mean score "
+                    f"{sum(scores) / len(scores):.1f}, max {max(scores)} "
+                    f"({time.perf_counter() - start:.1f}s)")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return network
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or inspect the 3x3 n-tuple network")
+    parser.add_argument("command", choices=["train", "info"])
+    parser.add_argument("--path", default=DEFAULT_PATH, help="weight file")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--games", type=int, default=1000, help="games per round")
+    parser.add_argument("--workers", type=int, default=1, help="processes to use, 0 for one per core")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    parser.add_argument("--seed", type=int, default=None, help="default: a random seed, printed")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        # Training continues from an existing weight file
+        network = NTupleNetwork.load(args.path) if os.path.exists(args.path) else NTupleNetwork()
+        seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+        workers = args.workers or os.cpu_count() or 1
+        print(f"seed {seed}, {workers} worker(s)")
+        train(network, args.rounds, args.games, workers, args.alpha, seed, log=print)
+        network.save(args.path)
+        print(f"Saved weights to {args.path}")
+    else:
+        network = NTupleNetwork.load(args.path)
+        nonzero = sum(1 for w in network.weights if w)
+        print(f"{len(network.weights)} weights, {nonzero} trained")
+        rng = random.Random(0)
+        boards = [bitboard.add_new_tile(bitboard.add_new_tile(0, rng), rng) for _ in range(2000)]
+        start = time.perf_counter()
+        for board in boards:
+            network.value(board)
+        print(f"{len(boards) / (time.perf_counter() - start):,.0f} evaluations/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import time
+
+import pygame
+
+# Frame pacing for the menu and game loops.
+#
+# A turn-based game has nothing to do while the player thinks, so a loop
+# that is idle blocks in pygame.event.wait until an event arrives (or
+# IDLE_TIMEOUT passes) instead of spinning at 60 frames a second. Only a
+# loop that has something moving on its own runs at the full frame rate:
+# it names that state ("countdown", "autoplay", "popup") when it asks for
+# its events.
+#
+# Wall time and process CPU time are added up per state for the whole run,
+# across all loops: the time up to each frame is charged to the state the
+# previous frame, in whichever loop, ran in. report_usage() prints them
+# (main.py does at quit).
+
+FPS = 60
+IDLE_TIMEOUT = 500  # milliseconds an idle loop sleeps without events
+IDLE = "idle"
+
+# state -> [wall seconds, cpu seconds, frames]
+usage = {}
+_last = {"state": None, "wall": 0.0, "cpu": 0.0}  # the previous frame
+
+
+class FramePacer:
+    """Paces one loop: blocks while idle, ticks at FPS while busy"""
+
+    def __init__(self, fps=FPS, idle_timeout=IDLE_TIMEOUT):
+        self.fps = fps
+        self.idle_timeout = idle_timeout
+        self.clock = pygame.time.Clock()
+
+    def get_time(self):
+        """Milliseconds between the last two frames, as Clock.get_time"""
+        return self.clock.get_time()
+
+    def events(self, state=None):
+        """The events for the next frame.
+
+        state names what keeps the loop busy; None means idle, and the
+        call blocks until there is an event or the idle timeout passes.
+        """
+        _charge(state or IDLE)
+        if state is None:
+            event = pygame.event.wait(self.idle_timeout)
+            self.clock.tick()
+            events = [] if event.type == pygame.NOEVENT else [event]
+            return events + pygame.event.get()
+        self.clock.tick(self.fps)
+        return pygame.event.get()
+
+
+def _charge(state):
+    """Charge the time since the previous frame to its state; start a frame in state"""
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    if _last["state"] is not None:
+        totals = usage.setdefault(_last["state"], [0.0, 0.0, 0])
+        totals[0] += wall - _last["wall"]
+        totals[1] += cpu - _last["cpu"]
+        totals[2] += 1
+    _last.update(state=state, wall=wall, cpu=cpu)
+
+
+def report_usage():
+    """Print wall time, CPU time and frame counts per loop state"""
+    _charge(None)  # close the running frame
+    for state, (wall, cpu, frames) in sorted(usage.items()):
+        share = 100 * cpu / wall if wall else 0.0
+        print(f"{state}: {wall:.1f}s, {cpu:.2f}s CPU ({share:.1f}%), {frames} frames")
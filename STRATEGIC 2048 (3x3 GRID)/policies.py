@@ -0,0 +1,99 @@
+import random
+
+import bitboard
+import ntuple
+import solver
+
+# Move policies for headless play. A policy takes a packed board with at
+# least one legal move and a random.Random, and returns a direction.
+
+
+def random_policy(board, rng):
+    return rng.choice(bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)])
+
+
+def greedy_policy(board, rng):
+    """Take the move with the largest immediate score, ties broken at random"""
+    best = []
+    best_score = -1
+    for direction in bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]:
+        _, _, gained, _ = bitboard.move(board, direction)
+        if gained > best_score:
+            best = [direction]
+            best_score = gained
+        elif gained == best_score:
+            best.append(direction)
+    return rng.choice(best)
+
+
+CORNER_ORDER = (bitboard.LEFT, bitboard.DOWN, bitboard.RIGHT, bitboard.UP)
+SOLVER_DEPTH = 2
+
+
+def corner_policy(board, rng):
+    """Keep tiles packed towards the bottom-left corner"""
+    legal = bitboard.legal_moves(board)
+    for direction in CORNER_ORDER:
+        if legal >> direction & 1:
+            return direction
+
+
+def solver_policy(board, rng):
+    """Fixed-depth expectimax, so games stay reproducible from their seed"""
+    values = solver.Expectimax().evaluate_moves(board, SOLVER_DEPTH)
+    return max(values, key=values.get)
+
+
+_network = None
+
+
+def _load_network():
+    global _network
+    if _network is None:
+        _network = ntuple.NTupleNetwork.load()
+    return _network
+
+
+def ntuple_policy(board, rng):
+    """Greedy move of the trained n-tuple network (see ntuple.py)"""
+    return _load_network().best_move(board)
+
+
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+    "corner": corner_policy,
+    "solver": solver_policy,
+    "ntuple": ntuple_policy,
+}
+
+
+def check_policy(name):
+    """Raise ValueError when the named policy cannot play here.
+
+    Worker processes load what a policy needs on first use, so callers
+    check first, where the error can still be reported to the user.
+    """
+    if name not in POLICIES:
+        raise ValueError(f"unknown policy {name!r}, expected one of {sorted(POLICIES)}")
+    if name == "ntuple":
+        try:
+            _load_network()
+        except (OSError, ValueError) as e:
+            raise ValueError(f"the ntuple policy needs trained weights ({e}); "
+                             "train them with: python ntuple.py train") from None
+
+
+def play_out(board, policy, rng=random):
+    """Play board to the end with policy, spawning tiles from rng.
+
+    Returns (score gained, moves made, final board).
+    """
+    score = 0
+    moves = 0
+    while bitboard.legal_moves(board):
+        board, _, gained, _ = bitboard.move(board, policy(board, rng))
+        board = bitboard.add_new_tile(board, rng)
+        score += gained
+        moves += 1
+    return score, moves, board
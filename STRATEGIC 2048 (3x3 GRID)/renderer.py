@@ -0,0 +1,96 @@
+import os
+
+import pygame
+from draw import board_cell_rects
+
+# Dirty-rectangle rendering for the menu and game loops.
+#
+# A loop tells the renderer, every frame, what each part of the screen
+# shows: a region is a name, the rect it covers and a state value (a tile
+# value, a score, the seconds left on a timer, a button's colors). When a
+# region's state or rect differs from the last frame its rect is dirty.
+# present() then runs the loop's draw function with the screen clipped to
+# the dirty area, so blits elsewhere cost next to nothing, and pushes only
+# the dirty rects with pygame.display.update. A frame where nothing changed
+# draws and pushes nothing.
+#
+# Anything drawn over the screen behind the renderer's back (a popup, a
+# different mode) must be followed by invalidate(), which repaints the
+# whole screen on the next present().
+#
+# The parts of a mode screen that never change (background, the empty
+# board, box frames and labels) are drawn once onto a layer made by
+# bake_layer, which the draw function blits before the dynamic content.
+#
+# Set FULL_REDRAW=1 in the environment to draw and flip the whole screen
+# every frame instead, e.g. to rule the renderer out when debugging.
+
+FULL_REDRAW = os.environ.get("FULL_REDRAW", "") not in ("", "0")
+
+
+def bake_layer(screen, draw):
+    """Screen-sized surface in the display's pixel format with draw(surface) on it"""
+    layer = pygame.Surface(screen.get_size()).convert(screen)
+    draw(layer)
+    return layer
+
+
+class Renderer:
+    """Repaints the parts of the screen whose content changed"""
+
+    def __init__(self, screen, full_redraw=FULL_REDRAW):
+        self.screen = screen
+        self.full_redraw = full_redraw
+        self._regions = {}  # name -> (rect, state) as last presented
+        self._dirty = []
+        self._invalid = True  # nothing has been drawn yet
+
+    def track(self, name, rect, state):
+        """Declare what region name shows this frame"""
+        rect = pygame.Rect(rect)
+        old = self._regions.get(name)
+        if old is not None and old[0] == rect and old[1] == state:
+            return
+        self._regions[name] = (rect, state)
+        self._dirty.append(rect)
+        if old is not None and old[0] != rect:
+            self._dirty.append(old[0])  # clear where it was
+
+    def track_button(self, name, button, visible=True):
+        self.track(name, button.button_rect,
+                   (visible, button.text_input, button.rect_color, button.text_color))
+
+    def track_board(self, grid, board_left=None, board_top=None):
+        """Track every cell of a grid drawn by draw.draw_board"""
+        cells = board_cell_rects(self.screen, len(grid), len(grid[0]), board_left, board_top)
+        self.track("board", cells[0][2].unionall([rect for _, _, rect in cells]), len(grid))
+        for row, col, rect in cells:
+            self.track(("cell", row, col), rect, grid[row][col])
+
+    def invalidate(self):
+        """Repaint everything on the next present()"""
+        self._invalid = True
+
+    def present(self, draw):
+        """Redraw the dirty regions with draw(screen) and show them.
+
+        Returns False when nothing needed drawing.
+        """
+        if self._invalid or self.full_redraw:
+            self._invalid = False
+            self._dirty.clear()
+            draw(self.screen)
+            pygame.display.flip()
+            return True
+        if not self._dirty:
+            return False
+
+        area = self._dirty[0].unionall(self._dirty[1:])
+        self.screen.set_clip(area)
+        try:
+            draw(self.screen)
+        finally:
+            self.screen.set_clip(None)
+        pygame.display.update(self._dirty)
+        self._dirty.clear()
+        return True
@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+from policies import POLICIES, check_policy, play_out
+
+# Headless game runner: plays many games with a policy and reports
+# throughput and score statistics. It only needs the packed engine, so it
+# never imports pygame and starts fast on servers.
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+
+def play_game(policy, seed):
+    """Play one game from an empty board; returns (score, moves, max tile)"""
+    rng = random.Random(seed)
+    board = bitboard.add_new_tile(bitboard.add_new_tile(0, rng), rng)
+    score, moves, board = play_out(board, policy, rng)
+    return score, moves, bitboard.exponent_to_value(bitboard.max_exponent(board))
+
+
+def _play_games(policy_name, seed, first, count):
+    # Each game seeds its own generator from (seed, game number), so the
+    # results do not depend on how games are split across workers.
+    policy = POLICIES[policy_name]
+    return [play_game(policy, f"{seed}-{index}") for index in range(first, first + count)]
+
+
+def simulate(policy="random", games=1000, seed=None, workers=1):
+    """Play games and return a list of (score, moves, max tile), one per game.
+
+    Without a seed a random one is chosen and printed, so the run can be
+    repeated with the same games.
+    """
+    check_policy(policy)
+    if seed is None:
+        seed = random.SystemRandom().randrange(1 << 32)
+        print(f"random seed {seed}")
+    if workers <= 1:
+        return _play_games(policy, seed, 0, games)
+
+    chunks = []
+    first = 0
+    base, extra = divmod(games, workers)
+    for i in range(workers):
+        count = base + (1 if i < extra else 0)
+        if count:
+            chunks.append((policy, seed, first, count))
+            first += count
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_results in pool.map(_play_games, *zip(*chunks)):
+            results.extend(chunk_results)
+    return results
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-q * len(sorted_values) // 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def report(results, elapsed):
+    games = len(results)
+    if not games:
+        print("no games played")
+        return
+    scores = sorted(score for score, _, _ in results)
+    moves = sum(moves for _, moves, _ in results)
+    print(f"{games} games, {moves} moves in {elapsed:.2f}s")
+    print(f"  {games / elapsed:.1f} games/sec, {moves / elapsed:.0f} moves/sec")
+    print(f"  mean score {sum(scores) / games:.1f}, max {scores[-1]}")
+    print("  score percentiles: " + ", ".join(f"p{q} {percentile(scores, q)}" for q in PERCENTILES))
+    print("  max tile distribution:")
+    tiles = {}
+    for _, _, tile in results:
+        tiles[tile] = tiles.get(tile, 0) + 1
+    for tile in sorted(tiles):
+        print(f"    {tile:>5}: {tiles[tile]:>8} ({100.0 * tiles[tile] / games:.2f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play 3x3 2048 games headless and report statistics")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None, help="default: a random seed, printed")
+    parser.add_argument("--workers", type=int, default=1, help="processes to use, 0 for one per core")
+    args = parser.parse_args(argv)
+    try:
+        check_policy(args.policy)
+    except ValueError as e:
+        parser.error(str(e))
+
+    workers = args.workers or os.cpu_count() or 1
+    given_seed = "" if args.seed is None else f", seed {args.seed}"
+    print(f"policy {args.policy}{given_seed}, {workers} worker(s)")
+    start = time.perf_counter()
+    results = simulate(args.policy, args.games, args.seed, workers)
+    report(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import time
+
+import bitboard
+
+# Depth-limited expectimax over packed boards. Max nodes try the four
+# moves, chance nodes average over every 2/4 spawn. Leaves are scored with
+# a per-row heuristic table applied to the rows and columns of the board.
+
+# Heuristic weights (larger is better, a lost board scores 0)
+SCORE_LOST_PENALTY = 200000.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+MERGES_WEIGHT = 700.0
+EMPTY_WEIGHT = 270.0
+
+# Chance nodes reached with a lower probability than this are cut off and
+# scored with the heuristic directly.
+PROBABILITY_CUTOFF = 0.0001
+DEFAULT_TIME_LIMIT = 0.2
+DEFAULT_MAX_DEPTH = 8
+
+
+def _row_heuristic(key):
+    cells = [(key >> (bitboard.CELL_BITS * i)) & bitboard.CELL_MASK for i in range(bitboard.SIZE)]
+    total = sum(exponent ** SUM_POWER for exponent in cells)
+    empty = cells.count(0)
+
+    merges = 0
+    previous = 0
+    counter = 0
+    for exponent in cells:
+        if exponent == 0:
+            continue
+        if exponent == previous:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        previous = exponent
+    if counter > 0:
+        merges += 1 + counter
+
+    monotonicity_left = 0.0
+    monotonicity_right = 0.0
+    for a, b in zip(cells, cells[1:]):
+        if a > b:
+            monotonicity_left += a ** MONOTONICITY_POWER - b ** MONOTONICITY_POWER
+        else:
+            monotonicity_right += b ** MONOTONICITY_POWER - a ** MONOTONICITY_POWER
+
+    return (SCORE_LOST_PENALTY + EMPTY_WEIGHT * empty + MERGES_WEIGHT * merges
+            - MONOTONICITY_WEIGHT * min(monotonicity_left, monotonicity_right)
+            - SUM_WEIGHT * total)
+
+
+ROW_HEURISTIC = [_row_heuristic(key) for key in range(1 << bitboard.ROW_BITS)]
+
+
+def heuristic(board):
+    """Static evaluation of a board: row heuristic summed over rows and columns"""
+    score = 0.0
+    for b in (board, bitboard.transpose(board)):
+        for r in range(bitboard.SIZE):
+            score += ROW_HEURISTIC[bitboard.get_row(b, r)]
+    return score
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out"""
+
+
+class Expectimax:
+    """One search with its own transposition table.
+
+    The table maps a canonical board to (depth, value) for chance nodes, so
+    the eight symmetric versions of a position are evaluated once. A
+    movecache.MoveCache can be passed as cache, but with the transposition
+    table doing the deduplication it slows 3x3 searches down (see
+    movecache.py).
+    """
+
+    def __init__(self, deadline=None, cutoff=PROBABILITY_CUTOFF, cache=None):
+        self.deadline = deadline
+        self.cutoff = cutoff
+        self.moves = cache.moves if cache is not None else bitboard.MOVES
+        self.table = {}
+        self.nodes = 0
+
+    def max_node(self, board, depth, probability):
+        best = 0.0  # no legal move: the game is lost
+        for move in self.moves:
+            new_board, moved, _, _ = move(board)
+            if moved:
+                value = self.chance_node(new_board, depth, probability)
+                if value > best:
+                    best = value
+        return best
+
+    def chance_node(self, board, depth, probability):
+        if depth <= 0 or probability < self.cutoff:
+            return heuristic(board)
+
+        key = bitboard.canonical(board)
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            return entry[1]
+
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 0xFF == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        cells = bitboard.empty_cells(board)
+        if not cells:
+            return heuristic(board)
+        p2 = 0.9 / len(cells)
+        p4 = 0.1 / len(cells)
+        total = 0.0
+        for shift in cells:
+            total += p2 * self.max_node(board | (1 << shift), depth - 1, probability * p2)
+            total += p4 * self.max_node(board | (2 << shift), depth - 1, probability * p4)
+
+        self.table[key] = (depth, total)
+        return total
+
+    def evaluate_moves(self, board, depth):
+        """Return {direction: value} for every legal move of board"""
+        values = {}
+        for direction, move in enumerate(self.moves):
+            new_board, moved, _, _ = move(board)
+            if moved:
+                values[direction] = self.chance_node(new_board, depth, 1.0)
+        return values
+
+
+def best_move(board, time_limit=DEFAULT_TIME_LIMIT, max_depth=DEFAULT_MAX_DEPTH, cache=None):
+    """Best direction for a packed board found within time_limit seconds.
+
+    Searches with iterative deepening and returns the choice of the deepest
+    completed depth, or None when no move is legal.
+    """
+    deadline = time.perf_counter() + time_limit
+    search = Expectimax(deadline, cache=cache)
+    best = None
+    for depth in range(1, max_depth + 1):
+        try:
+            values = search.evaluate_moves(board, depth)
+        except SearchTimeout:
+            break
+        if not values:
+            return None
+        best = max(values, key=values.get)
+    if best is None:
+        # Not even depth 1 finished in time; fall back to the heuristic
+        values = {}
+        for direction, move in enumerate(bitboard.MOVES):
+            new_board, moved, _, _ = move(board)
+            if moved:
+                values[direction] = heuristic(new_board)
+        best = max(values, key=values.get) if values else None
+    return best
@@ -1,10 +1,8 @@
 import pygame
 from button import Button
-from draw import draw_board
-from move import (
-    move_left, move_right, move_up, move_down,
-    initialize_grid, add_new_tile, can_move
-)
+from draw import draw_board, draw_board_well
+from move import Board, report_seed
+from bitboard import LEFT, RIGHT, UP, DOWN
 from level_systems import (
     swift_levels,
     level_selection_loop,
@@ -12,13 +10,18 @@ from level_systems import (
     show_game_over_message,
     unlock_next_level,
     is_final_level,
-    draw_swift_info_boards,
+    draw_swift_info_frame,
+    draw_swift_info_values,
     is_level_previously_completed,
-    check_swift_win
+    check_swift_win,
+    info_board_rect
 )
 from timer import Timer
+from fonts import get_font
+from renderer import Renderer, bake_layer
+from pacing import FramePacer
 
-def run_swift_mode(screen, font):
+def run_swift_mode(screen, font, seed=None):
     """Run the swift mode game loop"""
     background_image = pygame.image.load(r"C:/Users/cristian/Documents/STRATEGIC 2048 (3x3 GRID)/LOGO/backgroundswift.png")
     background_image = pygame.transform.scale(background_image, (700, 700))
@@ -35,17 +38,17 @@ def run_swift_mode(screen, font):
     level_data = swift_levels[current_level - 1].copy()
     level_data["level_number"] = current_level
     
-    # Initialize game state
-    grid = initialize_grid(3)
-    grid = add_new_tile(add_new_tile(grid))
-    score = 0
+    # Initialize game state; the Board keeps the score and empty cells
+    # up to date and spawns from the game's own seeded generator
+    game = Board(3, seed)
+    report_seed("Swift", game)
     
     # Initialize timer
     timer = Timer()
     timer.start()
     
     # Create buttons
-    button_font = pygame.font.Font(None, 36)
+    button_font = get_font(36)
     home_btn = Button(None, (430, 190), "Home", button_font, "Black", "Red")
     restart_btn = Button(None, (570, 190), "Restart", button_font, "Black", "Red")
     
@@ -53,39 +56,67 @@ def run_swift_mode(screen, font):
         """Restart current level"""
         timer.reset()
         timer.start()
-        new_grid = initialize_grid(3)
-        return add_new_tile(add_new_tile(new_grid)), 0
+        new_game = Board(3)
+        report_seed("Swift", new_game)
+        return new_game
     
-    clock = pygame.time.Clock()
+    key_directions = {
+        pygame.K_LEFT: LEFT, pygame.K_a: LEFT,
+        pygame.K_RIGHT: RIGHT, pygame.K_d: RIGHT,
+        pygame.K_UP: UP, pygame.K_w: UP,
+        pygame.K_DOWN: DOWN, pygame.K_s: DOWN,
+    }
     
-    while True:
-        elapsed_time = timer.get_elapsed_time()
-        screen.fill((250, 248, 239))
-        screen.blit(background_image, (0, 0))
+    def draw_static(surface):
+        surface.fill((250, 248, 239))
+        surface.blit(background_image, (0, 0))
+        draw_board_well(surface, 3, 3)
+        draw_swift_info_frame(surface, font, current_level, level_data)
+    
+    def draw_frame(screen):
+        # Background, empty board and info box frames come from the static layer
+        screen.blit(static_layer, (0, 0))
         
         # Draw the game board
-        draw_board(screen, grid, score, "", font, show_score=True)
+        draw_board(screen, game.grid, game.score, "", font, show_score=True, board_well=True)
         
         # Draw swift info
-        draw_swift_info_boards(screen, font, current_level, level_data, score, elapsed_time)
+        draw_swift_info_values(screen, font, level_data, game.score, elapsed_time)
         
         # Draw buttons
         home_btn.update(screen)
         restart_btn.update(screen)
+    
+    pacer = FramePacer()
+    renderer = Renderer(screen)
+    static_layer = bake_layer(screen, draw_static)  # redrawn when the level changes
+    
+    while True:
+        elapsed_time = timer.get_elapsed_time()
+        
+        # The timer shows whole seconds, so the info boards are redrawn
+        # once a second unless the score changes
+        seconds_left = int(max(0, level_data["time_limit"] - elapsed_time))
+        renderer.track_board(game.grid)
+        renderer.track("info", info_board_rect(screen), (current_level, game.score, seconds_left))
+        renderer.track_button("home", home_btn)
+        renderer.track_button("restart", restart_btn)
+        renderer.present(draw_frame)
         
         # Check time limit first
         if elapsed_time >= level_data["time_limit"]:
             timer.stop()
             result = show_game_over_message(screen, font, "swift", current_level, "Time's up!")
+            renderer.invalidate()  # the popup covered the screen
             if result == "retry":
-                grid, score = restart_level()
+                game = restart_level()
                 continue
             elif result == "home":
                 return "home"
             continue
         
-        # Handle events
-        for event in pygame.event.get():
+        # Handle events; the running timer keeps the loop at full frame rate
+        for event in pacer.events("countdown"):
             if event.type == pygame.QUIT:
                 return "home"
             
@@ -93,32 +124,25 @@ def run_swift_mode(screen, font):
                 if home_btn.checkforinput(event.pos):
                     return "home"
                 elif restart_btn.checkforinput(event.pos):
-                    grid, score = restart_level()
+                    game = restart_level()
             
             elif event.type == pygame.KEYDOWN:
-                moved = False
-                gained = 0
-                
-                if event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                    grid, moved, gained = move_left(grid)
-                elif event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                    grid, moved, gained = move_right(grid)
-                elif event.key == pygame.K_UP or event.key == pygame.K_w:
-                    grid, moved, gained = move_up(grid)
-                elif event.key == pygame.K_DOWN or event.key == pygame.K_s:
-                    grid, moved, gained = move_down(grid)
-                elif event.key == pygame.K_r:  # R key for restart
-                    grid, score = restart_level()
+                if event.key == pygame.K_r:  # R key for restart
+                    game = restart_level()
                     continue
                 elif event.key == pygame.K_ESCAPE:  # ESC key for home
                     return "home"
                 
+                direction = key_directions.get(event.key)
+                if direction is None:
+                    continue
+                
+                # Slides the board and spawns the next tile
+                moved, _, _ = game.move(direction)
+                
                 if moved:
-                    score += gained
-                    grid = add_new_tile(grid)
-                    
                     # Check win condition
-                    if check_swift_win(level_data, score, elapsed_time) == "win":
+                    if check_swift_win(level_data, game.score, elapsed_time) == "win":
                         timer.stop()
                         is_replay = is_level_previously_completed("swift", current_level)
                         
@@ -127,8 +151,9 @@ def run_swift_mode(screen, font):
                         
                         result = show_level_complete_message(
                             screen, font, "swift", current_level, 
-                            score, int(elapsed_time), is_replay=is_replay
+                            game.score, int(elapsed_time), is_replay=is_replay
                         )
+                        renderer.invalidate()
                         
                         if result == "next_level" and not is_final_level("swift", current_level):
                             # Go to next level
@@ -136,24 +161,23 @@ def run_swift_mode(screen, font):
                             if current_level <= len(swift_levels):
                                 level_data = swift_levels[current_level - 1].copy()
                                 level_data["level_number"] = current_level
-                                grid, score = restart_level()
+                                game = restart_level()
+                                static_layer = bake_layer(screen, draw_static)
                             else:
                                 return "home"
                         elif result == "retry":
-                            grid, score = restart_level()
+                            game = restart_level()
                         elif result == "home":
                             return "home"
                         
                         continue
                     
-                    if not can_move(grid):
+                    if not game.legal_moves():
                         timer.stop()
                         result = show_game_over_message(screen, font, "swift", current_level, "No more moves possible!")
+                        renderer.invalidate()
                         if result == "retry":
-                            grid, score = restart_level()
+                            game = restart_level()
                         elif result == "home":
                             return "home"
                         continue
-        
-        pygame.display.flip()
-        clock.tick(60)
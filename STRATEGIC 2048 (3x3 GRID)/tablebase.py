@@ -0,0 +1,309 @@
+import argparse
+import mmap
+import struct
+import time
+from array import array
+from bisect import bisect_left
+
+import bitboard
+
+# Exact tablebase for the 3x3 game.
+#
+# Every position reachable from a fresh game (initialize_grid(3) plus two
+# add_new_tile calls) is enumerated by canonical board. For each one the
+# tablebase stores the expected score still to come under optimal play and
+# the probability, under that same play, of ever holding each tile value.
+#
+# File layout (little endian):
+#   header:  MAGIC, capacity (Q), count (Q), max exponent K (Q)
+#   records: capacity slots of key (Q), value (d), K probabilities (H)
+# Probabilities are stored as fixed point, 65535 meaning certain. The slots
+# form an open-addressing hash table keyed by canonical board, filled to at
+# most LOAD_FACTOR, so a lookup is one hash and a few probes into the
+# memory-mapped file. Key 0 marks an empty slot (the empty board is never a
+# position).
+
+MAGIC = b"T2048TB1"
+HEADER = struct.Struct("<8sQQQ")
+DEFAULT_PATH = "tablebase.bin"
+LOAD_FACTOR = 0.8
+PROBABILITY_SCALE = 65535
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_U64 = (1 << 64) - 1
+
+
+def _record_struct(max_exponent):
+    return struct.Struct(f"<Qd{max_exponent}H")
+
+
+def _slot(key, capacity):
+    return (((key * _HASH_MULTIPLIER) & _U64) >> 32) % capacity
+
+
+def tile_sum(board):
+    total = 0
+    while board:
+        exponent = board & bitboard.CELL_MASK
+        if exponent:
+            total += 1 << exponent
+        board >>= bitboard.CELL_BITS
+    return total
+
+
+def start_positions():
+    """Canonical boards of every fresh game: two 2/4 tiles on distinct cells"""
+    shifts = range(0, bitboard.SIZE * bitboard.SIZE * bitboard.CELL_BITS, bitboard.CELL_BITS)
+    boards = set()
+    for first in shifts:
+        for second in shifts:
+            if second <= first:
+                continue
+            for a in (1, 2):
+                for b in (1, 2):
+                    boards.add(bitboard.canonical((a << first) | (b << second)))
+    return boards
+
+
+def enumerate_positions(log=None):
+    """Walk the state graph forward from the start positions.
+
+    A move keeps the tile sum and a spawn adds 2 or 4, so positions fall
+    into layers by tile sum and each layer only feeds the next two.
+    Returns {tile_sum: sorted array of canonical boards}.
+    """
+    pending = {}
+    for board in start_positions():
+        pending.setdefault(tile_sum(board), set()).add(board)
+
+    layers = {}
+    total = min(pending)
+    count = 0
+    while pending:
+        layer = pending.pop(total, None)
+        if layer:
+            plus_two = pending.setdefault(total + 2, set())
+            plus_four = pending.setdefault(total + 4, set())
+            for board in layer:
+                for move in bitboard.MOVES:
+                    after, moved, _, _ = move(board)
+                    if not moved:
+                        continue
+                    for shift in bitboard.empty_cells(after):
+                        plus_two.add(bitboard.canonical(after | (1 << shift)))
+                        plus_four.add(bitboard.canonical(after | (2 << shift)))
+            layers[total] = array("Q", sorted(layer))
+            count += len(layer)
+            if log:
+                log(f"sum {total}: {len(layer)} positions, {count} so far")
+        total += 2
+    return layers
+
+
+def _insert(data, capacity, record, key, value, probabilities):
+    slot = _slot(key, capacity)
+    while True:
+        offset = HEADER.size + slot * record.size
+        if not struct.unpack_from("<Q", data, offset)[0]:
+            record.pack_into(data, offset, key, value,
+                             *(round(p * PROBABILITY_SCALE) for p in probabilities))
+            return
+        slot += 1
+        if slot == capacity:
+            slot = 0
+
+
+def _solve_layer(layer, above, max_exponent):
+    """Values and reach probabilities for one layer, given the two above it.
+
+    above[e] holds (boards, values, probabilities) of the layer reached by
+    spawning a tile of exponent e (1 for a 2, 2 for a 4).
+    """
+    values = array("d", bytes(8 * len(layer)))
+    probabilities = array("f", bytes(4 * len(layer) * max_exponent))
+    for index, board in enumerate(layer):
+        best_value = 0.0
+        best_reach = None
+        for move in bitboard.MOVES:
+            after, moved, gained, _ = move(board)
+            if not moved:
+                continue
+            cells = bitboard.empty_cells(after)
+            value = float(gained)
+            reach = [0.0] * max_exponent
+            for exponent, odds in ((1, 0.9), (2, 0.1)):
+                boards, child_values, child_probabilities = above[exponent]
+                probability = odds / len(cells)
+                for shift in cells:
+                    i = bisect_left(boards, bitboard.canonical(after | (exponent << shift)))
+                    value += probability * child_values[i]
+                    offset = i * max_exponent
+                    for k in range(max_exponent):
+                        reach[k] += probability * child_probabilities[offset + k]
+            if best_reach is None or value > best_value:
+                best_value = value
+                best_reach = reach
+
+        # Entry k is the chance of ever holding tile 2 ** (k + 1); tiles
+        # already on the board count as reached.
+        held = bitboard.max_exponent(board)
+        offset = index * max_exponent
+        values[index] = best_value
+        for k in range(max_exponent):
+            if k < held:
+                probabilities[offset + k] = 1.0
+            elif best_reach is not None:
+                probabilities[offset + k] = best_reach[k]
+    return values, probabilities
+
+
+def build(path=DEFAULT_PATH, log=None):
+    """Enumerate every reachable 3x3 position and write the tablebase file.
+
+    Returns the number of positions stored.
+    """
+    layers = enumerate_positions(log)
+    count = sum(len(layer) for layer in layers.values())
+    max_exponent = max(bitboard.max_exponent(board) for layer in layers.values() for board in layer)
+    capacity = int(count / LOAD_FACTOR) + 1
+    record = _record_struct(max_exponent)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, capacity, count, max_exponent))
+        f.truncate(HEADER.size + capacity * record.size)
+
+    empty = (array("Q"), array("d"), array("f"))
+    solved = {}
+    with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0) as data:
+        # Solve from the largest tile sum down; a layer only needs the values
+        # of the two layers above it.
+        for total in sorted(layers, reverse=True):
+            layer = layers.pop(total)
+            above = {1: solved.get(total + 2, empty), 2: solved.get(total + 4, empty)}
+            values, probabilities = _solve_layer(layer, above, max_exponent)
+            for index, board in enumerate(layer):
+                offset = index * max_exponent
+                _insert(data, capacity, record, board, values[index], probabilities[offset:offset + max_exponent])
+            solved[total] = (layer, values, probabilities)
+            solved.pop(total + 4, None)
+            if log:
+                log(f"solved sum {total}")
+        data.flush()
+    return count
+
+
+class Tablebase:
+    """Read-only view of a tablebase file, memory-mapped"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self._file = open(path, "rb")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.capacity, self.count, self.max_exponent = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a tablebase file")
+        self._record = _record_struct(self.max_exponent)
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, board):
+        key = bitboard.canonical(board)
+        slot = _slot(key, self.capacity)
+        while True:
+            offset = HEADER.size + slot * self._record.size
+            stored = struct.unpack_from("<Q", self._data, offset)[0]
+            if stored == key:
+                return offset
+            if not stored:
+                return None
+            slot += 1
+            if slot == self.capacity:
+                slot = 0
+
+    def __contains__(self, board):
+        return self._find(board) is not None
+
+    def lookup(self, board):
+        """Return (expected score, {tile: reach probability}) or None.
+
+        The expected score is what optimal play still gains from board.
+        Boards that cannot occur in a real game are not stored.
+        """
+        offset = self._find(board)
+        if offset is None:
+            return None
+        _, value, *probabilities = self._record.unpack_from(self._data, offset)
+        return value, {1 << (k + 1): p / PROBABILITY_SCALE for k, p in enumerate(probabilities)}
+
+    def expected_score(self, board):
+        offset = self._find(board)
+        if offset is None:
+            return None
+        return struct.unpack_from("<d", self._data, offset + 8)[0]
+
+    def best_move(self, board):
+        """Optimal direction for board, from at most 4 x 2 x 9 lookups"""
+        best = None
+        best_value = -1.0
+        for direction, move in enumerate(bitboard.MOVES):
+            after, moved, gained, _ = move(board)
+            if not moved:
+                continue
+            cells = bitboard.empty_cells(after)
+            value = float(gained)
+            for exponent, odds in ((1, 0.9), (2, 0.1)):
+                for shift in cells:
+                    value += odds / len(cells) * (self.expected_score(after | (exponent << shift)) or 0.0)
+            if value > best_value:
+                best = direction
+                best_value = value
+        return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the exact 3x3 tablebase")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--path", default=DEFAULT_PATH, help="tablebase file")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.time()
+        count = build(args.path, log=print)
+        print(f"Stored {count} positions in {args.path} ({time.time() - start:.0f}s)")
+    else:
+        with Tablebase(args.path) as table:
+            print(f"{table.count} positions, tiles up to {1 << table.max_exponent}")
+            # Average over the real start distribution: a uniform cell and a
+            # 2/4 at 0.9/0.1 for each of the two opening tiles.
+            cells = bitboard.SIZE * bitboard.SIZE
+            expected = 0.0
+            reach = {}
+            for first in range(cells):
+                for second in range(cells):
+                    if second == first:
+                        continue
+                    for a, pa in ((1, 0.9), (2, 0.1)):
+                        for b, pb in ((1, 0.9), (2, 0.1)):
+                            board = (a << (bitboard.CELL_BITS * first)) | (b << (bitboard.CELL_BITS * second))
+                            weight = pa * pb / (cells * (cells - 1))
+                            value, probabilities = table.lookup(board)
+                            expected += weight * value
+                            for tile, p in probabilities.items():
+                                reach[tile] = reach.get(tile, 0.0) + weight * p
+            print(f"Optimal expected score of a new game: {expected:.1f}")
+            for tile in sorted(reach):
+                print(f"  P(reach {tile}) = {reach[tile]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+import bitboard
+import fuzz
+import move
+
+
+def _random_boards(count, seed, size=bitboard.SIZE):
+    rng = random.Random(seed)
+    return [sum(rng.choice((0, 0, 1, 2, 3, 5, 9)) << (bitboard.CELL_BITS * i) for i in range(size * size))
+            for _ in range(count)]
+
+
+def _play(game, seed, turns=200):
+    # Random legal moves until the game ends or turns run out; returns the
+    # directions played
+    rng = random.Random(seed)
+    directions = []
+    while len(directions) < turns and game.legal_moves():
+        direction = rng.choice(bitboard.LEGAL_DIRECTIONS[game.legal_moves()])
+        game.move(direction)
+        directions.append(direction)
+    return directions
+
+
+def test_empty_grid_is_not_game_over():
+    # The empty grid has no legal move, but no game has been lost on it
+    grid = move.initialize_grid(3)
+    assert move.legal_moves(grid) == 0
+    assert move.can_move(grid)
+    assert not move.game_over(grid)
+    assert bitboard.can_move(0)
+    assert not bitboard.game_over(0)
+
+
+def test_full_grid_without_merges_is_game_over():
+    grid = [[2, 4, 2], [4, 2, 4], [2, 4, 2]]
+    assert move.legal_moves(grid) == 0
+    assert not move.can_move(grid)
+    assert move.game_over(grid)
+
+
+def test_second_32768_tile_raises():
+    # Two 32768 tiles could never merge in 4 bit cells, so the move that
+    # would make the second one is refused and leaves the game as it was
+    game = move.Board(4, seed=1)
+    game.board = game.engine.pack([[32768, 16384, 16384, 0], [2, 4, 8, 16],
+                                   [4, 8, 16, 32], [8, 16, 32, 64]])
+    game.max_exponent = bitboard.MAX_EXPONENT
+    game.empty_mask = game.engine.empty_mask(game.board)
+    game.empty_count = 1
+    state = game.save()
+    with pytest.raises(OverflowError):
+        game.move(bitboard.RIGHT)
+    assert game.save() == state
+
+
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_board_tracking_matches_recompute(size):
+    game = move.Board(size, seed=11)
+    grid, rng = move.new_game(size, seed=11)
+    score = 0
+    play_rng = random.Random(5)
+    while game.legal_moves():
+        direction = play_rng.choice(bitboard.LEGAL_DIRECTIONS[game.legal_moves()])
+        game.move(direction)
+        grid, moved, gained, _ = move.MOVES[direction](grid)
+        assert moved
+        grid = move.add_new_tile(grid, rng)
+        score += gained
+        cells = [value for row in grid for value in row]
+        assert game.grid == grid
+        assert game.score == score
+        assert game.max_tile == max(cells)
+        assert game.empty_count == cells.count(0)
+        assert game.empty_mask == game.engine.empty_mask(game.board)
+
+
+def test_replay_is_deterministic():
+    game = move.Board(3, seed=42)
+    directions = _play(game, seed=1)
+    assert move.replay(42, directions) == (game.grid, game.score)
+    assert move.replay(42, directions) == (game.grid, game.score)
+    # Another seed spawns other tiles
+    assert move.replay(43, directions) != (game.grid, game.score)
+
+
+def test_canonical_symmetry_round_trips():
+    for board in _random_boards(500, seed=3):
+        key, s = bitboard.canonical_symmetry(board)
+        assert key == bitboard.apply_symmetry(board, s) == bitboard.canonical(board)
+        assert bitboard.apply_symmetry(key, bitboard.INVERSE_SYMMETRY[s]) == board
+        for direction in bitboard.DIRECTIONS:
+            # A move on the canonical board is the mapped move on the board
+            moved_key = bitboard.move(key, direction)
+            moved = bitboard.move(board, move.map_direction(direction, s))
+            assert bitboard.apply_symmetry(moved_key[0], bitboard.INVERSE_SYMMETRY[s]) == moved[0]
+            assert moved_key[1:] == moved[1:]
+    grid = bitboard.unpack(board)
+    assert move.canonical(grid) == bitboard.canonical_symmetry(board)
+
+
+def test_batch_matches_scalar_engine():
+    np = pytest.importorskip("numpy")
+    import batch
+    boards = _random_boards(500, seed=4)
+    packed = np.array(boards, dtype=np.uint64)
+    for direction in bitboard.DIRECTIONS:
+        new_boards, moved, scores = batch.move_boards(packed, direction)
+        expected = [bitboard.move(board, direction) for board in boards]
+        assert new_boards.tolist() == [result[0] for result in expected]
+        assert moved.tolist() == [result[1] for result in expected]
+        assert scores.tolist() == [result[2] for result in expected]
+    legal, terminal = batch.legal_moves(packed)
+    for board, row, over in zip(boards, legal.tolist(), terminal.tolist()):
+        assert sum(1 << d for d in bitboard.DIRECTIONS if row[d]) == bitboard.legal_moves(board)
+        assert over == bitboard.game_over(board)
+
+
+def test_fuzz_finds_no_mismatches():
+    checked, failures = fuzz.fuzz(boards=600, seed=2026)
+    assert checked == 600
+    assert failures == []